@@ -64,7 +64,7 @@ const PostsFeed = () => {
           count: post.like_count || 0
         };
         // Initialize comments count for each post
-        initialCommentsCounts[post.id] = post.comments ? post.comments.length : 0;
+        initialCommentsCounts[post.id] = post.comment_count ?? (post.comments ? post.comments.length : 0);
       });
       setPostLikeStates(initialStates);
       setCommentsCount(initialCommentsCounts);
@@ -11,3 +11,4 @@ admin.site.register(Post_Stat_like)
 admin.site.register(Post_Stat_hide)
 admin.site.register(Post_Stat_report)
 # admin.site.register(Post_Stat_report_Reasons)
+admin.site.register(FeedScore)
@@ -0,0 +1,219 @@
+"""
+app/autocomplete.py
+
+In-process prefix index for search typeahead.
+
+Each PrefixIndex keeps a sorted list of (term, id) keys and answers a prefix
+query with one bisect plus a short forward scan, so lookups never touch the
+database. Two indexes are kept: creators (username, first/last name, full
+name) and posts (title, and every word of the title).
+
+Every worker process holds its own copy. It is built from the database on
+a background thread as soon as the worker starts serving (`warm_up`, hooked
+up in AppConfig.ready), then updated in place by app/signals.py, and rebuilt
+the same way after AUTOCOMPLETE_REBUILD_SECONDS to pick up writes handled
+by other workers. A rebuild swaps the new keys in at once; requests never
+wait for it and keep answering from the current index meanwhile (an empty
+one, for the first few seconds of a worker's life). Local writes made during
+a build are replayed onto the new keys.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.contrib.auth.models import User
+from django.core.signals import request_started
+from django.db import close_old_connections, connection
+
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_REBUILD_SECONDS = 600
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []         # sorted [(term, id)]
+        self._terms = {}        # id -> terms currently indexed for it
+        self._payload = {}      # id -> dict returned to clients
+        self._lock = threading.Lock()
+
+    def add(self, item_id, payload, terms):
+        terms = {normalize(term) for term in terms} - {''}
+        with self._lock:
+            self._discard(item_id)
+            self._payload[item_id] = payload
+            self._terms[item_id] = terms
+            for term in terms:
+                insort(self._keys, (term, item_id))
+
+    def remove(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id):
+        for term in self._terms.pop(item_id, ()):
+            i = bisect_left(self._keys, (term, item_id))
+            if i < len(self._keys) and self._keys[i] == (term, item_id):
+                del self._keys[i]
+        self._payload.pop(item_id, None)
+
+    def load(self, items):
+        """Replaces the whole index with `items` of (id, payload, terms)."""
+        keys, terms_by_id, payloads = [], {}, {}
+        for item_id, payload, terms in items:
+            terms = {normalize(term) for term in terms} - {''}
+            terms_by_id[item_id] = terms
+            payloads[item_id] = payload
+            keys.extend((term, item_id) for term in terms)
+        keys.sort()
+        with self._lock:
+            self._keys, self._terms, self._payload = keys, terms_by_id, payloads
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and len(results) < limit:
+                term, item_id = self._keys[i]
+                if not term.startswith(prefix):
+                    break
+                if item_id not in seen:
+                    seen.add(item_id)
+                    results.append(self._payload[item_id])
+                i += 1
+        return results
+
+
+creators = PrefixIndex()
+posts = PrefixIndex()
+
+_built_at = None
+_build_lock = threading.Lock()
+_journal = None             # writes seen while a rebuild runs, replayed after the swap
+_journal_lock = threading.Lock()
+
+
+# ── ENTRIES ──────────────────────────────────────────────────────────────────
+
+def creator_entry(user_id, username, first_name, last_name):
+    payload = {'id': user_id, 'username': username, 'first_name': first_name, 'last_name': last_name}
+    full_name = f'{first_name or ""} {last_name or ""}'
+    return user_id, payload, [username, first_name, last_name, full_name]
+
+
+def post_entry(post_id, post_title, post_type):
+    payload = {'id': post_id, 'post_title': post_title, 'post_type': post_type}
+    words = normalize(post_title).split(' ')
+    # Every word boundary is a starting point: "easy pasta" matches "pa"
+    return post_id, payload, [' '.join(words[i:]) for i in range(len(words))]
+
+
+# ── BUILD / UPDATE ───────────────────────────────────────────────────────────
+
+def build():
+    """Rebuilds both indexes from the database. Callers hold _build_lock."""
+    global _built_at, _journal
+    with _journal_lock:
+        _journal = []
+    try:
+        creators.load(
+            creator_entry(*row)
+            for row in User.objects
+            .values_list('id', 'username', 'profile__first_name', 'profile__last_name')
+            .iterator(chunk_size=2000)
+        )
+        posts.load(
+            post_entry(*row)
+            for row in Post.objects.values_list('id', 'post_title', 'post_type').iterator(chunk_size=2000)
+        )
+    finally:
+        with _journal_lock:
+            journal, _journal = _journal, None
+    for apply, args in journal:
+        apply(*args)
+    _built_at = time.monotonic()
+
+
+def _rebuild_in_background():
+    close_old_connections()
+    try:
+        build()
+    except Exception:
+        # Keep serving the current index; the next stale request retries
+        logger.exception("autocomplete rebuild failed")
+    finally:
+        _build_lock.release()
+        connection.close()
+
+
+def ensure_built():
+    """Starts a background build if the index is missing or stale."""
+    if _built_at is not None and time.monotonic() - _built_at < AUTOCOMPLETE_REBUILD_SECONDS:
+        return
+    # One build at a time, and nobody waits for it
+    if _build_lock.acquire(blocking=False):
+        try:
+            threading.Thread(target=_rebuild_in_background, name='autocomplete-rebuild', daemon=True).start()
+        except Exception:
+            _build_lock.release()
+            raise
+
+
+def warm_up(**kwargs):
+    """
+    request_started receiver: builds the index as the worker serves its first
+    request. Hooked to a request rather than run from ready() itself, so
+    migrate and other management commands never scan the tables.
+    """
+    request_started.disconnect(warm_up)
+    ensure_built()
+
+
+def _record(apply, *args):
+    apply(*args)
+    with _journal_lock:
+        if _journal is not None:
+            _journal.append((apply, args))
+
+
+def index_user(user):
+    profile = getattr(user, 'profile', None)
+    _record(creators.add, *creator_entry(
+        user.pk,
+        user.username,
+        getattr(profile, 'first_name', None),
+        getattr(profile, 'last_name', None),
+    ))
+
+
+def index_post(post):
+    _record(posts.add, *post_entry(post.pk, post.post_title, post.post_type))
+
+
+def unindex_user(user_id):
+    _record(creators.remove, user_id)
+
+
+def unindex_post(post_id):
+    _record(posts.remove, post_id)
+
+
+def suggest(prefix, limit=AUTOCOMPLETE_LIMIT):
+    ensure_built()
+    return {
+        'creators': creators.search(prefix, limit),
+        'posts': posts.search(prefix, limit),
+    }
@@ -0,0 +1,162 @@
+"""
+app/creator_search.py
+
+Typo-tolerant creator search by trigram similarity over usernames and
+"first last" profile names.
+
+On PostgreSQL this is pg_trgm's similarity() backed by GIN trigram indexes
+(migration 0044). Elsewhere the trigrams are precomputed into CreatorTrigram,
+an inverted index: candidates are the users sharing the most trigrams with
+the query, and each is scored with the same Jaccard similarity pg_trgm uses,
+per field, keeping the best field.
+
+Ranked id lists share the search result cache in app/search.py.
+"""
+
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import CreatorTrigram
+from .search import cached_ids, rank_by
+
+
+CREATOR_RESULT_LIMIT = 10
+SIMILARITY_THRESHOLD = 0.3      # pg_trgm's default
+CANDIDATE_LIMIT = 200           # (user, field) pairs scored per query
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: lower-cased words padded with '  ' and ' '."""
+    grams = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _fields(username, first_name, last_name):
+    return {
+        CreatorTrigram.FIELD_USERNAME: trigrams(username),
+        CreatorTrigram.FIELD_NAME: trigrams(f'{first_name or ""} {last_name or ""}'),
+    }
+
+
+# ── INDEX MAINTENANCE (non-PostgreSQL) ───────────────────────────────────────
+
+def index_creator(user_id):
+    if connection.vendor == 'postgresql':
+        return
+    row = (
+        User.objects
+        .filter(pk=user_id)
+        .values_list('username', 'profile__first_name', 'profile__last_name')
+        .first()
+    )
+    with transaction.atomic():
+        CreatorTrigram.objects.filter(user_id=user_id).delete()
+        if row is not None:
+            CreatorTrigram.objects.bulk_create([
+                CreatorTrigram(user_id=user_id, field=field, trigram=gram)
+                for field, grams in _fields(*row).items()
+                for gram in grams
+            ])
+
+
+def rebuild_index(batch_size=1000):
+    """Repopulates CreatorTrigram from scratch. Returns users indexed."""
+    if connection.vendor == 'postgresql':
+        return 0
+    rows = (
+        User.objects
+        .values_list('id', 'username', 'profile__first_name', 'profile__last_name')
+        .order_by()
+        .iterator(chunk_size=batch_size)
+    )
+    indexed = 0
+    with transaction.atomic():
+        CreatorTrigram.objects.all().delete()
+        batch = []
+        for user_id, *names in rows:
+            indexed += 1
+            batch.extend(
+                CreatorTrigram(user_id=user_id, field=field, trigram=gram)
+                for field, grams in _fields(*names).items()
+                for gram in grams
+            )
+            if len(batch) >= batch_size:
+                CreatorTrigram.objects.bulk_create(batch)
+                batch = []
+        CreatorTrigram.objects.bulk_create(batch)
+    return indexed
+
+
+# ── QUERIES ──────────────────────────────────────────────────────────────────
+
+def _postgres_ids(query, limit, threshold):
+    sql = (
+        'SELECT u.id, GREATEST('
+        '  similarity(u.username, %s), '
+        "  similarity(COALESCE(p.first_name, '') || ' ' || COALESCE(p.last_name, ''), %s)"
+        ') AS score '
+        'FROM auth_user u LEFT JOIN user_userprofile p ON p.user_id = u.id '
+        'WHERE u.username %% %s '
+        "   OR (COALESCE(p.first_name, '') || ' ' || COALESCE(p.last_name, '')) %% %s "
+        'ORDER BY score DESC, u.id LIMIT %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, query, query, query, limit * 2])
+        return [user_id for user_id, score in cursor.fetchall() if score >= threshold][:limit]
+
+
+def _inverted_index_ids(query, limit, threshold):
+    query_grams = trigrams(query)
+    if not query_grams:
+        return []
+
+    candidates = list(
+        CreatorTrigram.objects
+        .filter(trigram__in=query_grams)
+        .values('user_id', 'field')
+        .annotate(shared=Count('id'))
+        .order_by('-shared')[:CANDIDATE_LIMIT]
+    )
+    if not candidates:
+        return []
+
+    sizes = {
+        (row['user_id'], row['field']): row['size']
+        for row in CreatorTrigram.objects
+        .filter(user_id__in={c['user_id'] for c in candidates})
+        .values('user_id', 'field')
+        .annotate(size=Count('id'))
+    }
+
+    scores = {}
+    for c in candidates:
+        size = sizes[(c['user_id'], c['field'])]
+        score = c['shared'] / (len(query_grams) + size - c['shared'])
+        if score >= threshold and score > scores.get(c['user_id'], 0):
+            scores[c['user_id']] = score
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [user_id for user_id, score in ranked[:limit]]
+
+
+def search_creator_ids(query, limit=CREATOR_RESULT_LIMIT, threshold=SIMILARITY_THRESHOLD):
+    """User ids whose username or profile name resembles `query`, best first."""
+    find = _postgres_ids if connection.vendor == 'postgresql' else _inverted_index_ids
+    return cached_ids(
+        f'creators:{limit}:{threshold}', query,
+        lambda normalized: find(normalized, limit, threshold),
+    )
+
+
+def search_creators(query, queryset=None, limit=CREATOR_RESULT_LIMIT):
+    """Similarity-ordered User queryset for `query`."""
+    queryset = User.objects.all() if queryset is None else queryset
+    return rank_by(queryset, search_creator_ids(query, limit)).order_by('search_rank')
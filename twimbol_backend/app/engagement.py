@@ -0,0 +1,317 @@
+"""
+app/engagement.py
+
+Per-viewer engagement state (liked / hidden / reported, followed / blocked
+creators) resolved for a whole page of posts at once.
+
+Serializers used to answer each flag with its own `.exists()` per post —
+three to five extra queries per item. `ViewerStateListSerializer` instead
+collects the page's ids, runs one query per flag, and shares the resulting
+id sets with every child through the serializer context.
+
+Comment previews (the latest few comments per post) are loaded the same
+way: one windowed query for the whole page, and `engagement_summary`
+answers the flags plus current counts for an arbitrary list of post ids
+(clients refreshing cached feed items) with the same fixed query count.
+
+Like / hide / report toggles are idempotent: setting runs `INSERT ...
+SELECT ... WHERE EXISTS (post) ON CONFLICT DO NOTHING RETURNING id`, so the
+existence check rides along, and unsetting is one `DELETE ... RETURNING id`.
+For a flag with a Post counter (FLAG_COUNTERS) the same statement moves the
+counter and returns its new value; on PostgreSQL the flag row, the counter
+and the read-back are one statement built from CTEs. post_save /
+post_delete are sent by hand only when a row actually changed, so the
+receivers in app/signals.py (exclusion cache) still run exactly once per
+real change; they leave counters marked `counter_applied` alone.
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Window
+from django.db.models.signals import post_delete, post_save
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from rest_framework import serializers
+
+from user.models import Follower
+from .exclusions import get_exclusions
+from .models import Post, Post_Comment, Post_Stat_hide, Post_Stat_like, Post_Stat_report
+
+
+COMMENT_PREVIEW_SIZE = 3
+MAX_SUMMARY_POST_IDS = 500
+
+
+def viewer_state(user, post_ids, creator_ids=()):
+    """
+    Returns {'liked', 'hidden', 'reported', 'following', 'blocked'} id sets for
+    `user`, limited to the given posts / creators. A fixed number of queries
+    regardless of how many ids are passed.
+    """
+    state = {key: set() for key in ('liked', 'hidden', 'reported', 'following', 'blocked')}
+    if user is None or not user.is_authenticated:
+        return state
+
+    post_ids = list(post_ids)
+    creator_ids = list(creator_ids)
+
+    if post_ids:
+        for key, model in (('liked', Post_Stat_like), ('hidden', Post_Stat_hide), ('reported', Post_Stat_report)):
+            state[key] = set(
+                model.objects
+                .filter(created_by=user, post_id__in=post_ids)
+                .values_list('post_id', flat=True)
+            )
+
+    if creator_ids:
+        state['following'] = set(
+            Follower.objects
+            .filter(follower=user, following_id__in=creator_ids)
+            .values_list('following_id', flat=True)
+        )
+        # Blocked ids are already cached for feed filtering
+        state['blocked'] = set(get_exclusions(user.id)['user_ids']) & set(creator_ids)
+
+    return state
+
+
+def engagement_summary(user, post_ids):
+    """
+    {post_id: {'liked', 'hidden', 'reported', 'like_count', 'comment_count'}}
+    for the posts in `post_ids` that exist. One query for the counts plus
+    viewer_state()'s three (none for anonymous viewers).
+    """
+    post_ids = list(post_ids)
+    counts = Post.objects.filter(pk__in=post_ids).values_list('id', 'like_count', 'comment_count')
+    state = viewer_state(user, post_ids)
+    return {
+        post_id: {
+            'liked': post_id in state['liked'],
+            'hidden': post_id in state['hidden'],
+            'reported': post_id in state['reported'],
+            'like_count': like_count,
+            'comment_count': comment_count,
+        }
+        for post_id, like_count, comment_count in counts
+    }
+
+
+def _preview_row(comment):
+    return {
+        'id': comment.id,
+        'comment': comment.comment,
+        'created_by': comment.created_by.username if comment.created_by_id else None,
+        'created_at': comment.created_at,
+    }
+
+
+def comment_previews(post_ids, limit=COMMENT_PREVIEW_SIZE):
+    """
+    Latest `limit` comments for each post, keyed by post id, in a single
+    ROW_NUMBER() OVER (PARTITION BY post_id ...) query.
+    """
+    previews = defaultdict(list)
+    if not post_ids:
+        return previews
+
+    rows = (
+        Post_Comment.objects
+        .filter(post_id__in=list(post_ids))
+        .select_related('created_by')
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=F('post_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(position__lte=limit)
+        .order_by('post_id', 'position')
+    )
+    for comment in rows:
+        previews[comment.post_id].append(_preview_row(comment))
+    return previews
+
+
+def comment_preview(post_id, limit=COMMENT_PREVIEW_SIZE):
+    """Single-post variant of comment_previews()."""
+    rows = (
+        Post_Comment.objects
+        .filter(post_id=post_id)
+        .select_related('created_by')
+        .order_by('-created_at', '-id')[:limit]
+    )
+    return [_preview_row(comment) for comment in rows]
+
+
+# Denormalized Post counters the toggles keep themselves, in the same
+# statement that writes the flag row
+FLAG_COUNTERS = {Post_Stat_like: 'like_count'}
+
+
+def set_flag(model, post_id, user, **fields):
+    """
+    Idempotently records that `user` liked / hid / reported `post_id`.
+    Returns (created, counter): whether a row was created, and the post's
+    counter for this flag afterwards (None for flags without one). Raises
+    Post.DoesNotExist for an unknown post and ValueError for a non-integer id.
+    """
+    post_id = int(post_id)
+    quote = connection.ops.quote_name
+    values = {
+        'post': post_id,
+        'created_by': user.pk,
+        'created_at': model._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection),
+        **fields,
+    }
+    columns = [model._meta.get_field(name) for name in values]
+    if connection.vendor == 'postgresql':
+        # INSERT ... SELECT resolves bare parameters as text
+        placeholders = [f'CAST(%s AS {field.db_type(connection)})' for field in columns]
+    else:
+        placeholders = ['%s'] * len(columns)
+    statement = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(quote(field.column) for field in columns)}) '
+        f'SELECT {", ".join(placeholders)} '
+        f'WHERE EXISTS (SELECT 1 FROM {quote(Post._meta.db_table)} WHERE {quote("id")} = %s) '
+        f'ON CONFLICT ({quote("post_id")}, {quote("created_by_id")}) DO NOTHING '
+        f'RETURNING {quote("id")}'
+    )
+    counter = FLAG_COUNTERS.get(model)
+    try:
+        with transaction.atomic():
+            written = _write_flag(statement, [*values.values(), post_id], post_id, counter, 1)
+            if written is None:
+                raise Post.DoesNotExist(f'Post {post_id} does not exist.')
+            row_id, count = written
+            if row_id is not None:
+                instance = model(pk=row_id, post_id=post_id, created_by=user, **fields)
+                instance.counter_applied = counter is not None
+                post_save.send(sender=model, instance=instance, created=True, update_fields=None, raw=False, using=connection.alias)
+    except IntegrityError:
+        # The post was deleted between the EXISTS check and the (deferred) FK check
+        raise Post.DoesNotExist(f'Post {post_id} does not exist.')
+    return row_id is not None, count
+
+
+def clear_flag(model, post_id, user):
+    """
+    One-shot DELETE of the user's row. Returns (removed, counter) like
+    set_flag(), and raises Post.DoesNotExist for an unknown post the same way.
+    """
+    post_id = int(post_id)
+    quote = connection.ops.quote_name
+    statement = (
+        f'DELETE FROM {quote(model._meta.db_table)} '
+        f'WHERE {quote("post_id")} = %s AND {quote("created_by_id")} = %s '
+        f'RETURNING {quote("id")}'
+    )
+    counter = FLAG_COUNTERS.get(model)
+    with transaction.atomic():
+        written = _write_flag(statement, [post_id, user.pk], post_id, counter, -1)
+        if written is None:
+            raise Post.DoesNotExist(f'Post {post_id} does not exist.')
+        row_id, count = written
+        if row_id is not None:
+            instance = model(pk=row_id, post_id=post_id, created_by=user)
+            instance.counter_applied = counter is not None
+            post_delete.send(sender=model, instance=instance, using=connection.alias, origin=instance)
+    return row_id is not None, count
+
+
+def _write_flag(statement, params, post_id, counter, delta):
+    """
+    Runs `statement` (an INSERT / DELETE of a flag row RETURNING its id),
+    moves the post's `counter` by `delta` if it wrote a row, and reads the
+    counter back. Returns (row id or None, counter or None), or None if the
+    post does not exist. One statement on PostgreSQL; elsewhere two.
+    """
+    quote = connection.ops.quote_name
+    posts, pk = quote(Post._meta.db_table), quote('id')
+    column = quote(counter) if counter else 'NULL'
+    bump = (
+        f'UPDATE {posts} SET {column} = {column} + %s '
+        f'WHERE {pk} = %s AND {column} + %s >= 0'
+    )
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # The outer SELECT reads the pre-statement snapshot, hence the
+            # bumped value coming back from the CTE
+            if counter:
+                sql = (
+                    f'WITH flag AS ({statement}), '
+                    f'bump AS ({bump} AND EXISTS (SELECT 1 FROM flag) RETURNING {column}) '
+                    f'SELECT (SELECT {pk} FROM flag), COALESCE((SELECT {column} FROM bump), {column}) '
+                    f'FROM {posts} WHERE {pk} = %s'
+                )
+                params = [*params, delta, post_id, delta]
+            else:
+                sql = f'WITH flag AS ({statement}) SELECT (SELECT {pk} FROM flag), NULL FROM {posts} WHERE {pk} = %s'
+            cursor.execute(sql, [*params, post_id])
+            return cursor.fetchone()
+
+        cursor.execute(statement, params)
+        row = cursor.fetchone()
+        row_id = row[0] if row else None
+        if counter and row_id is not None:
+            cursor.execute(f'{bump} RETURNING {column}', [delta, post_id, delta])
+            bumped = cursor.fetchone()
+            if bumped is not None:
+                return row_id, bumped[0]
+        cursor.execute(f'SELECT {column} FROM {posts} WHERE {pk} = %s', [post_id])
+        found = cursor.fetchone()
+        return None if found is None else (row_id, found[0])
+
+
+class ViewerStateListSerializer(serializers.ListSerializer):
+    """
+    List serializer for post-like items. The child must implement
+    `get_viewer_post_id(obj)` and `get_viewer_creator_id(obj)`, and may add
+    more page-wide data through `get_page_context(post_ids)`.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        post_ids = {self.child.get_viewer_post_id(item) for item in items}
+
+        request = self.context.get('request')
+        self.context['viewer_state'] = viewer_state(
+            getattr(request, 'user', None),
+            post_ids,
+            {self.child.get_viewer_creator_id(item) for item in items},
+        )
+        if hasattr(self.child, 'get_page_context'):
+            self.context.update(self.child.get_page_context(post_ids))
+        return super().to_representation(items)
+
+
+class ViewerStateMixin:
+    """
+    Flag lookups for serializers using ViewerStateListSerializer. Falls back
+    to a single `.exists()` when an item is serialized on its own.
+    """
+
+    def get_viewer_post_id(self, obj):
+        return obj.pk
+
+    def get_viewer_creator_id(self, obj):
+        return obj.created_by_id
+
+    def _viewer_flag(self, key, model, obj):
+        state = self.context.get('viewer_state')
+        if state is not None:
+            return self.get_viewer_post_id(obj) in state[key]
+
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return model.objects.filter(post_id=self.get_viewer_post_id(obj), created_by=user).exists()
+        return False
+
+    def get_liked_by_user(self, obj):
+        return self._viewer_flag('liked', Post_Stat_like, obj)
+
+    def get_hidden_by_user(self, obj):
+        return self._viewer_flag('hidden', Post_Stat_hide, obj)
+
+    def get_reported_by_user(self, obj):
+        return self._viewer_flag('reported', Post_Stat_report, obj)
@@ -0,0 +1,55 @@
+"""
+app/exclusions.py
+
+Per-user feed exclusion sets (hidden posts, reported posts, blocked creators).
+
+Every authenticated feed request needs these three id lists. They change only
+when the user hides/reports a post or blocks someone, so they are cached per
+user and dropped by the receivers in app/signals.py on any such write.
+"""
+
+from django.core.cache import cache
+
+from user.models import Block
+from .models import Post_Stat_hide, Post_Stat_report
+
+
+EXCLUSIONS_TTL = 60 * 10  # bounds staleness when running without a shared cache
+
+
+def _key(user_id):
+    return f'feed:exclusions:{user_id}'
+
+
+def get_exclusions(user_id):
+    """
+    Returns {'post_ids': [...], 'user_ids': [...]} for the given viewer,
+    loading it from the three source tables on a cache miss.
+    """
+    exclusions = cache.get(_key(user_id))
+    if exclusions is None:
+        hidden = Post_Stat_hide.objects.filter(created_by_id=user_id).values_list('post_id', flat=True)
+        reported = Post_Stat_report.objects.filter(created_by_id=user_id).values_list('post_id', flat=True)
+        exclusions = {
+            'post_ids': sorted(set(hidden) | set(reported)),
+            'user_ids': list(Block.objects.filter(blocker_id=user_id).values_list('blocked_id', flat=True)),
+        }
+        cache.set(_key(user_id), exclusions, EXCLUSIONS_TTL)
+    return exclusions
+
+
+def invalidate_exclusions(user_id):
+    if user_id is not None:
+        cache.delete(_key(user_id))
+
+
+def exclude_for_user(queryset, user, post_field='pk', creator_field='created_by_id'):
+    """Filters a feed queryset down to what `user` has not hidden, reported or blocked."""
+    if not user.is_authenticated:
+        return queryset
+    exclusions = get_exclusions(user.id)
+    if exclusions['post_ids']:
+        queryset = queryset.exclude(**{f'{post_field}__in': exclusions['post_ids']})
+    if exclusions['user_ids']:
+        queryset = queryset.exclude(**{f'{creator_field}__in': exclusions['user_ids']})
+    return queryset
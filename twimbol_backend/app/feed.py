@@ -0,0 +1,214 @@
+"""
+app/feed.py
+
+Global feed scoring, materialized into the FeedScore table.
+
+The recency + trending part of a post's feed score is the same for every
+viewer, so instead of rebuilding it with Case/When on every feed request it
+is computed here in bulk and stored on FeedScore. `manage.py
+refresh_feed_scores` re-runs it (schedule it every few minutes).
+
+Feed requests read FeedScore in index order (`ranked()`), filtered on its
+post_type and ordered by its score, so a page walks
+feedscore_type_score_idx instead of scoring and sorting every post. The
+per-viewer follow boost never enters the sort key: BoostedFeed merges a
+followed-creators walk (score + boost) with an everyone-else walk, reading
+only as many rows from each as the requested page needs.
+"""
+
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import FeedScore, Post
+
+
+# ── RECENCY TIERS ────────────────────────────────────────────────────────────
+# (max age, points). Posts have a longer shelf-life than reels (articles,
+# guides, discussions stay relevant days/weeks), so their decay window is
+# wider and gentler, with an extra 90-day tier — good posts age gracefully.
+POST_RECENCY_TIERS = [
+    (timedelta(hours=24), 25.0),
+    (timedelta(days=7),   18.0),
+    (timedelta(days=30),  10.0),
+    (timedelta(days=90),   4.0),
+]
+
+REEL_RECENCY_TIERS = [
+    (timedelta(hours=24), 30.0),
+    (timedelta(days=7),   20.0),
+    (timedelta(days=30),  10.0),
+]
+
+
+# ── TRENDING WEIGHTS ─────────────────────────────────────────────────────────
+# Formula:  (likes × w  +  comments × w  +  views × w) / 100
+#
+# Posts weight comments more heavily than reels do (×3 vs ×2) because leaving
+# a comment on a text post is a stronger engagement signal — the user
+# actually read and thought about the content. Posts don't track views.
+# The divisor keeps both types' scores in the same range.
+POST_TRENDING_WEIGHTS = {'like_count': 3, 'comment_count': 3}
+REEL_TRENDING_WEIGHTS = {'like_count': 3, 'comment_count': 2, 'view_count': 1}
+TRENDING_DIVISOR = 100.0
+
+
+FEED_SCORING = {
+    'post': {
+        'recency_tiers': POST_RECENCY_TIERS,
+        'trending_weights': POST_TRENDING_WEIGHTS,
+    },
+    'reel': {
+        'recency_tiers': REEL_RECENCY_TIERS,
+        'trending_weights': REEL_TRENDING_WEIGHTS,
+    },
+}
+
+
+# ── FOLLOWED-CREATOR BOOST ───────────────────────────────────────────────────
+# Added per viewer at request time, by BoostedFeed. Posts get slightly less than reels
+# because users browse them less passively — discovery matters more there.
+POST_FOLLOW_BOOST = 35.0
+REEL_FOLLOW_BOOST = 30.0
+
+
+def recency_expression(tiers, now=None):
+    now = now or timezone.now()
+    return Case(
+        *[When(created_at__gte=now - age, then=Value(points)) for age, points in tiers],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def trending_expression(weights):
+    total = sum(
+        (F(field) * weight for field, weight in weights.items()),
+        Value(0),
+    )
+    return ExpressionWrapper(total / Value(TRENDING_DIVISOR), output_field=FloatField())
+
+
+def initial_score(post_type):
+    """Score for a brand-new post: top recency tier, no engagement yet."""
+    scoring = FEED_SCORING.get(post_type)
+    if not scoring:
+        return 0.0
+    return scoring['recency_tiers'][0][1]
+
+
+def refresh_feed_scores(batch_size=1000):
+    """
+    Recompute FeedScore for every scored post type.
+
+    Reads (id, recency, trending) straight from one annotated query per type
+    and upserts them in batches, so memory stays flat regardless of table size.
+    Returns the number of rows written.
+    """
+    now = timezone.now()
+    written = 0
+
+    for post_type, scoring in FEED_SCORING.items():
+        queryset = Post.objects.filter(post_type=post_type)
+        if 'view_count' in scoring['trending_weights']:
+            queryset = queryset.annotate(view_count=Coalesce(F('reels__view_count'), Value(0)))
+
+        rows = (
+            queryset
+            .annotate(
+                recency=recency_expression(scoring['recency_tiers'], now),
+                trending=trending_expression(scoring['trending_weights']),
+            )
+            .values_list('id', 'recency', 'trending')
+            .order_by()
+        )
+
+        batch = []
+        for post_id, recency, trending in rows.iterator(chunk_size=batch_size):
+            batch.append(FeedScore(
+                post_id=post_id,
+                post_type=post_type,
+                recency_score=recency,
+                trending_score=trending,
+                score=recency + trending,
+                refreshed_at=now,
+            ))
+            if len(batch) >= batch_size:
+                written += _upsert(batch)
+                batch = []
+        written += _upsert(batch)
+
+    return written
+
+
+def _upsert(batch):
+    if batch:
+        FeedScore.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['post'],
+            update_fields=['post_type', 'recency_score', 'trending_score', 'score', 'refreshed_at'],
+        )
+    return len(batch)
+
+
+# ── FEED READS ───────────────────────────────────────────────────────────────
+
+def ranked(queryset, score_field):
+    """
+    `queryset` annotated with `feed_score` (the FeedScore score at
+    `score_field`) and ordered by it, highest id first on ties. Filter it on
+    the FeedScore post_type to get a walk of feedscore_type_score_idx.
+    """
+    # Tie-break on FeedScore's own key (the post id), so the whole ORDER BY
+    # is the index
+    owner = score_field.rsplit('__', 1)[0]
+    return queryset.annotate(feed_score=F(score_field)).order_by('-feed_score', f'-{owner}__pk')
+
+
+class BoostedFeed:
+    """
+    A `ranked()` queryset with `boost` added to posts from creators the viewer
+    follows (`follows_creator` is the Exists() for that).
+
+    Adding the boost in SQL would make every row's sort key a computed value,
+    so it is read as two index-ordered queries instead: everyone else's posts
+    and followed creators' posts with the boost added. A slice fetches at most
+    `stop` rows from each and merges them. It supports what the paginators
+    use: filter() (keyset cursors), count() and slicing.
+    """
+    ordered = True
+
+    def __init__(self, queryset, score_field, follows_creator, boost):
+        self.others = queryset.filter(~follows_creator)
+        self.followed = queryset.filter(follows_creator).annotate(feed_score=ExpressionWrapper(
+            F(score_field) + Value(boost),
+            output_field=FloatField(),
+        ))
+
+    def filter(self, *args, **kwargs):
+        clone = object.__new__(BoostedFeed)
+        clone.others = self.others.filter(*args, **kwargs)
+        clone.followed = self.followed.filter(*args, **kwargs)
+        return clone
+
+    def count(self):
+        return self.others.count() + self.followed.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.stop is None or index.step is not None:
+            raise TypeError("BoostedFeed only supports bounded slices.")
+        rows = heapq.merge(
+            self.others[:index.stop],
+            self.followed[:index.stop],
+            key=lambda row: (row.feed_score, row.pk),
+            reverse=True,
+        )
+        return list(islice(rows, index.start or 0, index.stop))
@@ -0,0 +1,44 @@
+"""
+app/feed_cache.py
+
+Shared response cache for anonymous feed pages.
+
+Logged-out users all see the same feed, so a page is computed once and
+served from the cache for ANON_FEED_TTL seconds. Keys embed a generation
+number that app/signals.py bumps whenever a post is published or deleted,
+which orphans every cached page at once without having to enumerate them.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+
+
+ANON_FEED_TTL = 30
+GENERATION_KEY = 'feed:anon:generation'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+def anonymous_feed_key(request, endpoint):
+    # Host is part of the key because `next` links in the payload are absolute
+    params = sorted(request.query_params.lists())
+    digest = hashlib.md5(f'{request.get_host()}|{params}'.encode()).hexdigest()
+    return f'feed:anon:{endpoint}:{_generation()}:{digest}'
+
+
+def get_cached_page(key):
+    return cache.get(key)
+
+
+def set_cached_page(key, data):
+    cache.set(key, data, ANON_FEED_TTL)
@@ -0,0 +1,53 @@
+"""
+app/hyperloglog.py
+
+Minimal HyperLogLog cardinality sketch (Flajolet et al., with the usual
+small-range correction) for counting unique viewers.
+
+With PRECISION = 12 a sketch is 4096 one-byte registers — 4 KB on disk —
+and estimates any cardinality within ~1.6% standard error. Sketches merge
+by taking the register-wise max, so daily sketches combine into weekly or
+monthly totals without re-reading any view events.
+"""
+
+import hashlib
+import math
+
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+_HASH_BITS = 64
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+
+class HyperLogLog:
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(REGISTERS)
+        if len(self.registers) != REGISTERS:
+            raise ValueError(f"expected {REGISTERS} registers, got {len(self.registers)}")
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        index = x >> (_HASH_BITS - PRECISION)
+        rest = x & ((1 << (_HASH_BITS - PRECISION)) - 1)
+        rank = (_HASH_BITS - PRECISION) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        registers = other.registers if isinstance(other, HyperLogLog) else other
+        self.registers = bytearray(map(max, self.registers, registers))
+        return self
+
+    def count(self):
+        estimate = _ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Small-range correction (linear counting)
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes(self.registers)
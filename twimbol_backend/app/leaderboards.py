@@ -0,0 +1,124 @@
+"""
+app/leaderboards.py
+
+Per-creator top-content leaderboards, materialized into CreatorTopContent.
+
+For every creator, post type, metric (views / likes / comments) and window
+(7d / 30d from the daily engagement rollups in app/rollups.py, all-time from
+the counters on Post / ReelCloudinary / VideoCloudinary) the top
+LEADERBOARD_SIZE posts are ranked in the database with
+ROW_NUMBER() OVER (PARTITION BY creator, post_type ORDER BY value DESC).
+Creators are processed CREATOR_BATCH at a time, so a refresh costs one
+ranking query per metric and window per batch, however many creators there
+are. `manage.py refresh_creator_leaderboards` runs it; schedule it after
+roll_up_engagement.
+
+Ranks are stored per post type; the overall top K is the best K of the
+per-type lists, so it is exact without storing a separate ranking.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .models import CreatorTopContent, EngagementRollup, Post, PostEngagementRollup
+
+
+LEADERBOARD_SIZE = 10
+CREATOR_BATCH = 200
+
+METRICS = ('views', 'likes', 'comments')
+WINDOWS = {'7d': 7, '30d': 30, 'all': None}
+
+# Lifetime value of each metric on a Post row
+LIFETIME_VALUES = {
+    'views': Coalesce('reels__view_count', 'videos__view_count', Value(0)),
+    'likes': F('like_count'),
+    'comments': F('comment_count'),
+}
+
+
+def refresh_leaderboards(batch_size=CREATOR_BATCH):
+    """Rebuilds every creator's leaderboards. Returns the number of entries written."""
+    now = timezone.now()
+    creator_ids = list(
+        Post.objects.order_by('created_by_id').values_list('created_by_id', flat=True).distinct()
+    )
+    written = 0
+    for start in range(0, len(creator_ids), batch_size):
+        written += _refresh_batch(creator_ids[start:start + batch_size], now)
+
+    # Creators who no longer have any posts
+    CreatorTopContent.objects.filter(refreshed_at__lt=now).delete()
+    return written
+
+
+def _refresh_batch(creator_ids, now):
+    entries = [
+        CreatorTopContent(
+            creator_id=creator_id,
+            post_id=post_id,
+            post_type=post_type,
+            metric=metric,
+            window=window,
+            rank=rank,
+            value=value,
+            refreshed_at=now,
+        )
+        for window, days in WINDOWS.items()
+        for metric in METRICS
+        for post_id, creator_id, post_type, value, rank in _ranked(creator_ids, metric, days, now)
+    ]
+    with transaction.atomic():
+        CreatorTopContent.objects.filter(creator_id__in=creator_ids).delete()
+        CreatorTopContent.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def _ranked(creator_ids, metric, days, now):
+    """(post_id, creator_id, post_type, value, rank) for each batch creator's top posts."""
+    if days is None:
+        rows = (
+            Post.objects
+            .filter(created_by_id__in=creator_ids)
+            .annotate(value=LIFETIME_VALUES[metric])
+            .values_list('id', 'created_by_id', 'post_type', 'value')
+        )
+        creator, post_type, post_id = F('created_by_id'), F('post_type'), F('id')
+    else:
+        since = timezone.localtime(now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = (
+            PostEngagementRollup.objects
+            .filter(period=EngagementRollup.DAY, bucket__gt=since, post__created_by_id__in=creator_ids)
+            .values_list('post_id', 'post__created_by_id', 'post__post_type')
+            .annotate(value=Sum(metric))
+        )
+        creator, post_type, post_id = F('post__created_by_id'), F('post__post_type'), F('post_id')
+
+    return (
+        rows
+        .filter(value__gt=0)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[creator, post_type],
+            order_by=[F('value').desc(), post_id.desc()],
+        ))
+        .filter(rank__lte=LEADERBOARD_SIZE)
+        .order_by()
+    )
+
+
+def top_content(creator_id, metric, window, post_type=None, limit=LEADERBOARD_SIZE):
+    """The creator's best `limit` entries, optionally for one post type, best first."""
+    entries = (
+        CreatorTopContent.objects
+        .filter(creator_id=creator_id, metric=metric, window=window)
+        .select_related('post')
+        .order_by('-value', '-post_id')
+    )
+    if post_type:
+        entries = entries.filter(post_type=post_type)
+    return list(entries[:limit])
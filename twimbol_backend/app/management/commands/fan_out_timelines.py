@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app.timelines import fan_out_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Finish follower-timeline fan-outs left pending by a worker that died "
+        "mid-way. Run it periodically, e.g. every 5 minutes from cron."
+    )
+
+    def handle(self, *args, **options):
+        done = fan_out_pending()
+        self.stdout.write(self.style.SUCCESS(f"fanned out {done} pending post(s)"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app import creator_search, search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the post full-text search index (FTS5 on SQLite, tsvector on "
+        "PostgreSQL) and the creator trigram index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = search.rebuild_index(batch_size=options['batch_size'])
+        creators = creator_search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"indexed {posts} post(s) and {creators} creator(s)"))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from app.models import Post, Post_Comment, Post_Stat_like
+
+
+def _count_of(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(c=Count('pk'))
+            .values('c')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.like_count / Post.comment_count and fix any rows that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        drifted = (
+            Post.objects
+            .annotate(true_likes=_count_of(Post_Stat_like), true_comments=_count_of(Post_Comment))
+            .filter(~Q(like_count=F('true_likes')) | ~Q(comment_count=F('true_comments')))
+            .only('id', 'like_count', 'comment_count')
+        )
+
+        fixed = 0
+        batch = []
+        for post in drifted.iterator(chunk_size=batch_size):
+            post.like_count = post.true_likes
+            post.comment_count = post.true_comments
+            batch.append(post)
+            if len(batch) >= batch_size:
+                fixed += self._flush(batch, options['dry_run'])
+                batch = []
+        fixed += self._flush(batch, options['dry_run'])
+
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} post(s) with drifted counters"))
+
+    def _flush(self, batch, dry_run):
+        if batch and not dry_run:
+            Post.objects.bulk_update(batch, ['like_count', 'comment_count'])
+        return len(batch)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.leaderboards import CREATOR_BATCH, refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-creator top-content leaderboards (CreatorTopContent). "
+        "Run it periodically after roll_up_engagement, e.g. every 15 minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CREATOR_BATCH)
+
+    def handle(self, *args, **options):
+        written = refresh_leaderboards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"wrote {written} leaderboard entr{'y' if written == 1 else 'ies'}"))
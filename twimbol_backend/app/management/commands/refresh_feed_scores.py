@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.feed import refresh_feed_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized FeedScore table (recency + trending). "
+        "Run it periodically, e.g. every 5 minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = refresh_feed_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"refreshed {written} feed score(s)"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app.rollups import prune_hourly, roll_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Count new likes, comments and follows into the hourly / daily "
+        "engagement rollups (recounting the recent overlap) and prune "
+        "expired hourly buckets. Run it periodically, e.g. every 5 minutes "
+        "from cron."
+    )
+
+    def handle(self, *args, **options):
+        written = roll_up()
+        pruned = prune_hourly()
+        self.stdout.write(self.style.SUCCESS(
+            f"wrote {written} bucket(s), pruned {pruned} hourly bucket(s)"
+        ))
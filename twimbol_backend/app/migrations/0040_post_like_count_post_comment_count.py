@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:49
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('app', 'Post')
+    Post_Stat_like = apps.get_model('app', 'Post_Stat_like')
+    Post_Comment = apps.get_model('app', 'Post_Comment')
+
+    def count_of(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(post=OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(c=Count('pk'))
+                .values('c')[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    Post.objects.update(
+        like_count=count_of(Post_Stat_like),
+        comment_count=count_of(Post_Comment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0039_alter_post_stat_like_created_by_post_stat_hide_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:51
+
+from datetime import timedelta
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copy of the scoring in app/feed.py as of this migration:
+# post type -> (recency tiers, trending weights)
+FEED_SCORING = {
+    'post': (
+        [(timedelta(hours=24), 25.0), (timedelta(days=7), 18.0), (timedelta(days=30), 10.0), (timedelta(days=90), 4.0)],
+        {'like_count': 3, 'comment_count': 3},
+    ),
+    'reel': (
+        [(timedelta(hours=24), 30.0), (timedelta(days=7), 20.0), (timedelta(days=30), 10.0)],
+        {'like_count': 3, 'comment_count': 2, 'view_count': 1},
+    ),
+}
+TRENDING_DIVISOR = 100.0
+
+
+def seed_feed_scores(apps, schema_editor):
+    # What refresh_feed_scores would write, so existing posts rank by score
+    # from the start instead of by recency until its first scheduled run
+    Post = apps.get_model('app', 'Post')
+    FeedScore = apps.get_model('app', 'FeedScore')
+    ReelCloudinary = apps.get_model('create', 'ReelCloudinary')
+
+    now = timezone.now()
+    views = dict(ReelCloudinary.objects.values_list('post_id', 'view_count'))
+    rows = Post.objects.filter(post_type__in=FEED_SCORING).values(
+        'id', 'post_type', 'created_at', 'like_count', 'comment_count',
+    )
+    batch = []
+    for row in rows.iterator():
+        tiers, weights = FEED_SCORING[row['post_type']]
+        row['view_count'] = views.get(row['id']) or 0
+        recency = next((points for age, points in tiers if row['created_at'] >= now - age), 0.0)
+        trending = sum((row[field] or 0) * weight for field, weight in weights.items()) / TRENDING_DIVISOR
+        batch.append(FeedScore(
+            post_id=row['id'],
+            post_type=row['post_type'],
+            recency_score=recency,
+            trending_score=trending,
+            score=recency + trending,
+            refreshed_at=now,
+        ))
+    FeedScore.objects.bulk_create(batch, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0040_post_like_count_post_comment_count'),
+        ('create', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='global_score', serialize=False, to='app.post')),
+                ('post_type', models.CharField(max_length=100)),
+                ('recency_score', models.FloatField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['post_type', '-score'], name='feedscore_type_score_idx')],
+            },
+        ),
+        migrations.RunPython(seed_feed_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:53
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copies of app.timelines.FOLLOW_BACKFILL / TIMELINE_CAP
+FOLLOW_BACKFILL = 50
+TIMELINE_CAP = 500
+
+
+def backfill_timelines(apps, schema_editor):
+    # What app.timelines.backfill_timeline + trim_timelines would have done
+    # for every follow that predates the timeline table
+    Follower = apps.get_model('user', 'Follower')
+    Post = apps.get_model('app', 'Post')
+    TimelineEntry = apps.get_model('app', 'TimelineEntry')
+
+    following = defaultdict(set)
+    for follower_id, creator_id in Follower.objects.values_list('follower_id', 'following_id').iterator():
+        following[follower_id].add(creator_id)
+
+    recent = {}
+    for user_id, creator_ids in following.items():
+        entries = []
+        for creator_id in creator_ids:
+            if creator_id not in recent:
+                recent[creator_id] = list(
+                    Post.objects
+                    .filter(created_by_id=creator_id)
+                    .order_by('-created_at')
+                    .values_list('id', 'post_type', 'created_at')[:FOLLOW_BACKFILL]
+                )
+            entries.extend(recent[creator_id])
+        entries.sort(key=lambda entry: (entry[2], entry[0]), reverse=True)
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=post_id, post_type=post_type, created_at=created_at)
+                for post_id, post_type, created_at in entries[:TIMELINE_CAP]
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0041_feedscore'),
+        ('user', '0012_follower'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_type', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='app.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'post_type', '-created_at'], name='timeline_user_type_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Full-text search index for posts; see app/search.py.
+# FTS5 virtual table on SQLite, GIN-indexed tsvector side table on PostgreSQL.
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE app_post_search ('
+            'post_id bigint PRIMARY KEY REFERENCES app_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            'post_type varchar(100) NOT NULL, document tsvector NOT NULL)'
+        )
+        schema_editor.execute('CREATE INDEX app_post_search_document_idx ON app_post_search USING GIN (document)')
+        schema_editor.execute(
+            'INSERT INTO app_post_search (post_id, post_type, document) '
+            "SELECT p.id, p.post_type, setweight(to_tsvector('simple', p.post_title), 'A') || "
+            "setweight(to_tsvector('simple', u.username), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(p.post_description, '')), 'C') "
+            'FROM app_post p JOIN auth_user u ON u.id = p.created_by_id'
+        )
+    else:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE app_post_fts USING fts5('
+            "post_title, username, post_description, post_type UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO app_post_fts (rowid, post_title, username, post_description, post_type) '
+            "SELECT p.id, p.post_title, u.username, COALESCE(p.post_description, ''), p.post_type "
+            'FROM app_post p JOIN auth_user u ON u.id = p.created_by_id'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    table = 'app_post_search' if schema_editor.connection.vendor == 'postgresql' else 'app_post_fts'
+    schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0042_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
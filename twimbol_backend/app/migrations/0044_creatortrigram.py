@@ -0,0 +1,82 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:01
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def trigrams(text):
+    # Frozen copy of app.creator_search.trigrams as of this migration, so
+    # later changes there never alter what this backfill writes
+    grams = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def populate_trigrams(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # pg_trgm does the work there; see app/creator_search.py
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_trgm_idx '
+            'ON auth_user USING GIN (username gin_trgm_ops)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS user_userprofile_name_trgm_idx ON user_userprofile '
+            "USING GIN ((COALESCE(first_name, '') || ' ' || COALESCE(last_name, '')) gin_trgm_ops)"
+        )
+        return
+
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    CreatorTrigram = apps.get_model('app', 'CreatorTrigram')
+    batch = []
+    for user_id, username, first_name, last_name in (
+        User.objects
+        .values_list('id', 'username', 'profile__first_name', 'profile__last_name')
+        .iterator(chunk_size=1000)
+    ):
+        for field, text in (('username', username), ('name', f'{first_name or ""} {last_name or ""}')):
+            batch.extend(CreatorTrigram(user_id=user_id, field=field, trigram=gram) for gram in trigrams(text))
+        if len(batch) >= 1000:
+            CreatorTrigram.objects.bulk_create(batch)
+            batch = []
+    CreatorTrigram.objects.bulk_create(batch)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS auth_user_username_trgm_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS user_userprofile_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0043_post_search_index'),
+        ('user', '0017_alter_userprofile_user_status_block_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=10)),
+                ('trigram', models.CharField(max_length=3)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_trigrams', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram'], name='creatortrigram_trigram_idx')],
+                'unique_together': {('user', 'field', 'trigram')},
+            },
+        ),
+        migrations.RunPython(populate_trigrams, drop_trigram_indexes),
+    ]
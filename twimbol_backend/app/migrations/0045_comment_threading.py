@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    # Every existing comment is top-level: its path is just its own id
+    Post_Comment = apps.get_model('app', 'Post_Comment')
+    batch = []
+    for comment in Post_Comment.objects.only('pk').iterator(chunk_size=1000):
+        comment.path = f'{comment.pk:010d}/'
+        batch.append(comment)
+        if len(batch) >= 1000:
+            Post_Comment.objects.bulk_update(batch, ['path'])
+            batch = []
+    Post_Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0044_creatortrigram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post_comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post_comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='app.post_comment'),
+        ),
+        migrations.AddField(
+            model_name='post_comment',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='post_comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post_comment',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
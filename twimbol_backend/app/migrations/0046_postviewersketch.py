@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0045_comment_threading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewerSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewer_sketches', to='app.post')),
+            ],
+            options={
+                'unique_together': {('post', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0049_post_creator_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorTopContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_type', models.CharField(max_length=100)),
+                ('metric', models.CharField(choices=[('views', 'Views'), ('likes', 'Likes'), ('comments', 'Comments')], max_length=16)),
+                ('window', models.CharField(choices=[('7d', 'Last 7 days'), ('30d', 'Last 30 days'), ('all', 'All time')], max_length=8)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('value', models.BigIntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_content', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='app.post')),
+            ],
+            options={
+                'unique_together': {('creator', 'metric', 'window', 'post_type', 'rank')},
+            },
+        ),
+    ]
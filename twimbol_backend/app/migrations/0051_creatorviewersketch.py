@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_creator_sketches(apps, schema_editor):
+    # Register-wise max of each creator's post sketches per day. The merge
+    # is inlined so this migration never depends on app/hyperloglog.py
+    PostViewerSketch = apps.get_model('app', 'PostViewerSketch')
+    CreatorViewerSketch = apps.get_model('app', 'CreatorViewerSketch')
+    merged = {}
+    rows = (
+        PostViewerSketch.objects
+        .values_list('post__created_by_id', 'day', 'registers')
+        .iterator(chunk_size=500)
+    )
+    for creator_id, day, registers in rows:
+        key = (creator_id, day)
+        registers = bytes(registers)
+        merged[key] = bytes(map(max, merged[key], registers)) if key in merged else registers
+    CreatorViewerSketch.objects.bulk_create(
+        [
+            CreatorViewerSketch(creator_id=creator_id, day=day, registers=registers)
+            for (creator_id, day), registers in merged.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0050_creatortopcontent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorViewerSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewer_sketches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('creator', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_creator_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0052_post_fanout_pending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='rollupcursor',
+            name='last_id',
+        ),
+        migrations.AddField(
+            model_name='rollupcursor',
+            name='counted_through',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='creatorengagementrollup',
+            index=models.Index(fields=['period', 'bucket'], name='creator_rollup_bucket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postengagementrollup',
+            index=models.Index(fields=['period', 'bucket'], name='post_rollup_bucket_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0053_rollup_counted_through'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedscore',
+            name='feedscore_type_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feedscore',
+            index=models.Index(fields=['post_type', '-score', '-post'], name='feedscore_type_score_idx'),
+        ),
+    ]
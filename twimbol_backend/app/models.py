@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models.fields.related import OneToOneField, ForeignKey
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 
@@ -13,7 +14,26 @@ class Post(models.Model):
     post_description = models.TextField(null=True)
     post_banner = models.ImageField(upload_to='img/posts/', null=True, blank=True, default='img/posts/post_banner_default.jpg')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='post_created_by')
+
+    # Denormalized engagement counters, kept in sync by app/signals.py.
+    # Run `manage.py reconcile_post_counters` to repair any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    # True from publish until the post has been pushed into every follower's
+    # timeline (app/timelines.py); following feeds pull these in meanwhile.
+    fanout_pending = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            # A creator's own posts, newest first (profile, manage contents)
+            models.Index(fields=['created_by', '-created_at', '-id'], name='post_creator_created_idx'),
+            models.Index(
+                fields=['created_by'],
+                condition=models.Q(fanout_pending=True),
+                name='post_fanout_pending_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.post_title
@@ -21,13 +41,239 @@ class Post(models.Model):
 
 
 
+class FeedScore(models.Model):
+    """
+    Materialized global feed score (recency + trending) for a post.
+    Rebuilt in bulk by `manage.py refresh_feed_scores`; see app/feed.py.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='global_score'
+    )
+    post_type = models.CharField(max_length=100)
+    recency_score = models.FloatField(default=0)
+    trending_score = models.FloatField(default=0)
+    score = models.FloatField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post_type', '-score', '-post'], name='feedscore_type_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.score}"
+
+
+
+
+
+class TimelineEntry(models.Model):
+    """
+    One post in a follower's "following" timeline, written at publish time
+    (fan-out on write) so the following feed never has to look up who the
+    viewer follows. Trimmed to TIMELINE_CAP entries per user; see app/timelines.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    post_type = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', 'post_type', '-created_at'], name='timeline_user_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in {self.user_id}'s timeline"
+
+
+
+
+
+class PostViewerSketch(models.Model):
+    """
+    HyperLogLog sketch (app/hyperloglog.py) of the distinct viewers of a post
+    on one day. Merged across days for weekly / monthly unique-viewer totals;
+    written by create/view_counters.py.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='viewer_sketches')
+    day = models.DateField()
+    registers = models.BinaryField()
+
+    class Meta:
+        unique_together = ('post', 'day')
+
+    def __str__(self):
+        return f"viewers of {self.post_id} on {self.day}"
+
+
+
+class CreatorViewerSketch(models.Model):
+    """
+    Union of a creator's PostViewerSketch rows for one day, kept alongside
+    them so weekly / monthly creator totals merge ~30 sketches instead of
+    one per post per day.
+    """
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='viewer_sketches')
+    day = models.DateField()
+    registers = models.BinaryField()
+
+    class Meta:
+        unique_together = ('creator', 'day')
+
+    def __str__(self):
+        return f"viewers of {self.creator_id}'s posts on {self.day}"
+
+
+
+
+
+class EngagementRollup(models.Model):
+    """
+    Engagement events counted into one hour or one day. Maintained by
+    app/rollups.py so analytics charts read a few hundred bucket rows
+    instead of scanning the raw like / comment / follow tables.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIOD_CHOICES = [(HOUR, 'Hour'), (DAY, 'Day')]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()  # start of the hour / local day
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class PostEngagementRollup(EngagementRollup):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='engagement_rollups')
+
+    class Meta:
+        unique_together = ('post', 'period', 'bucket')
+        indexes = [models.Index(fields=['period', 'bucket'], name='post_rollup_bucket_idx')]
+
+    def __str__(self):
+        return f"{self.post_id} {self.period} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class CreatorEngagementRollup(EngagementRollup):
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='engagement_rollups')
+    follows = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('creator', 'period', 'bucket')
+        indexes = [models.Index(fields=['period', 'bucket'], name='creator_rollup_bucket_idx')]
+
+    def __str__(self):
+        return f"{self.creator_id} {self.period} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class RollupCursor(models.Model):
+    """How far (by created_at) each source has been counted into the rollups."""
+    source = models.CharField(max_length=32, unique=True)
+    counted_through = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.counted_through}"
+
+
+
+
+
+class CreatorTopContent(models.Model):
+    """
+    One precomputed leaderboard entry: the post at `rank` among the creator's
+    posts of `post_type` by `metric` over `window`. Rebuilt in creator batches
+    by `manage.py refresh_creator_leaderboards`; see app/leaderboards.py.
+    """
+    METRIC_CHOICES = [('views', 'Views'), ('likes', 'Likes'), ('comments', 'Comments')]
+    WINDOW_CHOICES = [('7d', 'Last 7 days'), ('30d', 'Last 30 days'), ('all', 'All time')]
+
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='top_content')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    post_type = models.CharField(max_length=100)
+    metric = models.CharField(max_length=16, choices=METRIC_CHOICES)
+    window = models.CharField(max_length=8, choices=WINDOW_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    value = models.BigIntegerField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('creator', 'metric', 'window', 'post_type', 'rank')
+
+    def __str__(self):
+        return f"#{self.rank} {self.metric}/{self.window} for {self.creator_id}: {self.post_id}"
+
+
+
+
+
+class CreatorTrigram(models.Model):
+    """
+    Trigram inverted index over usernames and profile names, used for
+    typo-tolerant creator search on backends without pg_trgm.
+    Maintained by app/creator_search.py.
+    """
+    FIELD_USERNAME = 'username'
+    FIELD_NAME = 'name'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_trigrams')
+    field = models.CharField(max_length=10)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = ('user', 'field', 'trigram')
+        indexes = [
+            models.Index(fields=['trigram'], name='creatortrigram_trigram_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram!r} for {self.user_id} ({self.field})"
+
+
+
+
 
 class Post_Comment(models.Model):
+    MAX_DEPTH = 20  # path holds 11 chars per level
+
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_comments')
     comment = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comment_created_by', blank=True)
 
+    # Reply threading. `path` is the materialized path of zero-padded ids from
+    # the top-level comment down ("0000000012/0000000040/"), so a thread's
+    # replies are one range scan on (post, path) in conversation order.
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, related_name='replies', null=True, blank=True)
+    path = models.CharField(max_length=255, blank=True, default='')
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The post_save counter bump must commit or roll back with the row
+        with transaction.atomic():
+            if self.parent_id and not self.path:
+                self.depth = self.parent.depth + 1
+            super().save(*args, **kwargs)
+            if not self.path:
+                # The path ends in our own id, known only after the INSERT
+                self.path = (self.parent.path if self.parent_id else '') + f'{self.pk:010d}/'
+                Post_Comment.objects.filter(pk=self.pk).update(path=self.path)
+
     def __str__(self):
         return self.comment
 
@@ -44,6 +290,16 @@ class Post_Stat_like(models.Model):
     
     class Meta:
         unique_together = ('post', 'created_by')
+        indexes = [
+            # Liker lists page newest-first per post
+            models.Index(fields=['post', '-created_at', '-id'], name='like_post_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The post_save counter bump must commit or roll back with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return str(self.created_by) + " to " + str(self.post)
 
@@ -0,0 +1,211 @@
+"""
+app/rollups.py
+
+Hourly and daily engagement rollups (PostEngagementRollup /
+CreatorEngagementRollup) for creator analytics charts.
+
+Likes, comments and follows are counted from their raw tables by
+created_at. Each source remembers how far it has been counted
+(RollupCursor.counted_through), and every run recounts from the start of the
+local day that lies RECOUNT_WINDOW before that point, one day per
+transaction, grouped by (post, creator, hour) in the database. Recounted
+buckets are overwritten with absolute counts, so re-scanning the overlap is
+idempotent, and a row whose transaction commits late (after a run has
+passed its created_at) is still picked up by the next run.
+`manage.py roll_up_engagement` runs it; schedule it every few minutes.
+
+Views have no raw event table, so create/view_counters.py adds them with
+`add_views()` when it flushes. Those are added with one relative UPDATE per
+chunk of buckets (`SET views = views + CASE ...`), so flushes from several
+workers can write the same bucket concurrently. Recounts only ever write the
+likes / comments / follows columns.
+
+Buckets still inside the recount window follow the raw tables, so a like that
+is taken back soon disappears from them again; older buckets are final.
+Hourly rows are pruned after HOURLY_RETENTION; daily rows are kept.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from user.models import Follower
+from .models import (
+    CreatorEngagementRollup,
+    EngagementRollup,
+    Post,
+    Post_Comment,
+    Post_Stat_like,
+    PostEngagementRollup,
+    RollupCursor,
+)
+
+
+UPDATE_CHUNK = 500                      # buckets per grouped UPDATE
+SETTLE_TIME = timedelta(seconds=30)     # leave rows this young for the next run
+RECOUNT_WINDOW = timedelta(hours=6)     # recounted every run, for late commits
+HOURLY_RETENTION = timedelta(days=14)
+
+# source -> (model, counter, post id field, creator id field)
+SOURCES = {
+    'likes': (Post_Stat_like, 'likes', 'post_id', 'post__created_by_id'),
+    'comments': (Post_Comment, 'comments', 'post_id', 'post__created_by_id'),
+    'follows': (Follower, 'follows', None, 'following_id'),
+}
+
+
+def _buckets(moment):
+    """The (period, bucket start) pairs a timestamp is counted in."""
+    local = timezone.localtime(moment)
+    return (
+        (EngagementRollup.HOUR, local.replace(minute=0, second=0, microsecond=0)),
+        (EngagementRollup.DAY, local.replace(hour=0, minute=0, second=0, microsecond=0)),
+    )
+
+
+def roll_up():
+    """Recounts likes / comments / follows into the rollups. Returns buckets written."""
+    cutoff = timezone.now() - SETTLE_TIME
+    return sum(_roll_up_source(source, cutoff) for source in SOURCES)
+
+
+def _roll_up_source(source, cutoff):
+    model = SOURCES[source][0]
+    counted = RollupCursor.objects.filter(source=source).values_list('counted_through', flat=True).first()
+    if counted is None:
+        # First run: count the whole table
+        counted = model.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        if counted is None:
+            return 0
+    else:
+        counted -= RECOUNT_WINDOW
+
+    written = 0
+    day = _day_start(min(counted, cutoff))
+    while day <= cutoff:
+        next_day = _day_start(day + timedelta(hours=25))
+        written += _recount_day(source, day, next_day, cutoff)
+        day = next_day
+    return written
+
+
+def _day_start(moment):
+    return dict(_buckets(moment))[EngagementRollup.DAY]
+
+
+def _recount_day(source, day, next_day, cutoff):
+    model, counter, post_field, creator_field = SOURCES[source]
+    with transaction.atomic():
+        # The locked cursor keeps concurrent runs from interleaving their writes
+        cursor, _ = RollupCursor.objects.select_for_update().get_or_create(source=source)
+        rows = (
+            model.objects
+            .filter(created_at__gte=day, created_at__lt=next_day, created_at__lte=cutoff)
+            .annotate(hour=TruncHour('created_at'))
+            .values(*[field for field in (post_field, creator_field) if field], 'hour')
+            .annotate(events=Count('pk'))
+            .order_by()
+        )
+        post_counts = defaultdict(int)
+        creator_counts = defaultdict(int)
+        for row in rows:
+            for period, bucket in _buckets(row['hour']):
+                if post_field:
+                    post_counts[(row[post_field], period, bucket)] += row['events']
+                creator_counts[(row[creator_field], period, bucket)] += row['events']
+
+        # Buckets of the day that no longer have any rows go back to zero
+        in_day = (
+            Q(period=EngagementRollup.HOUR, bucket__gte=day, bucket__lt=next_day)
+            | Q(period=EngagementRollup.DAY, bucket=day)
+        )
+        if post_field:
+            PostEngagementRollup.objects.filter(in_day).exclude(**{counter: 0}).update(**{counter: 0})
+            _write(PostEngagementRollup, 'post_id', counter, post_counts, relative=False)
+        CreatorEngagementRollup.objects.filter(in_day).exclude(**{counter: 0}).update(**{counter: 0})
+        _write(CreatorEngagementRollup, 'creator_id', counter, creator_counts, relative=False)
+
+        counted_through = min(next_day, cutoff)
+        if cursor.counted_through is None or cursor.counted_through < counted_through:
+            cursor.counted_through = counted_through
+            cursor.save(update_fields=['counted_through', 'updated_at'])
+    return len(post_counts) + len(creator_counts)
+
+
+def add_views(views):
+    """Adds flushed view counts ({(post_id, moment): views}) to the buckets containing each moment."""
+    creators = dict(
+        Post.objects.filter(pk__in={post_id for post_id, _ in views}).values_list('pk', 'created_by_id')
+    )
+
+    post_counts = defaultdict(int)
+    creator_counts = defaultdict(int)
+    for (post_id, moment), count in views.items():
+        if post_id not in creators:
+            continue
+        for period, bucket in _buckets(moment):
+            post_counts[(post_id, period, bucket)] += count
+            creator_counts[(creators[post_id], period, bucket)] += count
+
+    with transaction.atomic():
+        _write(PostEngagementRollup, 'post_id', 'views', post_counts, relative=True)
+        _write(CreatorEngagementRollup, 'creator_id', 'views', creator_counts, relative=True)
+
+
+def _write(model, owner_field, counter, counts, relative):
+    # Create missing buckets, then add to (relative) or overwrite their counter
+    if not counts:
+        return
+    model.objects.bulk_create(
+        [model(**{owner_field: owner}, period=period, bucket=bucket) for owner, period, bucket in counts],
+        ignore_conflicts=True,
+    )
+    items = list(counts.items())
+    for start in range(0, len(items), UPDATE_CHUNK):
+        chunk = items[start:start + UPDATE_CHUNK]
+        keys = [Q(**{owner_field: owner}, period=period, bucket=bucket) for (owner, period, bucket), _ in chunk]
+        condition = Q()
+        for key in keys:
+            condition |= key
+        value = Case(
+            *[When(key, then=Value(events)) for key, (_, events) in zip(keys, chunk)],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        model.objects.filter(condition).update(**{counter: F(counter) + value if relative else value})
+
+
+def prune_hourly(retention=HOURLY_RETENTION):
+    """Deletes hourly buckets older than `retention`. Returns rows deleted."""
+    before = timezone.now() - retention
+    deleted = 0
+    for model in (PostEngagementRollup, CreatorEngagementRollup):
+        deleted += model.objects.filter(period=EngagementRollup.HOUR, bucket__lt=before).delete()[0]
+    return deleted
+
+
+def timeseries(creator_id, period, days, post_id=None):
+    """
+    Buckets of the last `days` days, oldest first, for a creator or (with
+    `post_id`) one of their posts. Buckets without activity are omitted.
+    """
+    since = dict(_buckets(timezone.now() - timedelta(days=days)))[period]
+    if post_id is None:
+        queryset = CreatorEngagementRollup.objects.filter(creator_id=creator_id)
+        fields = ('likes', 'comments', 'views', 'follows')
+    else:
+        queryset = PostEngagementRollup.objects.filter(post_id=post_id, post__created_by_id=creator_id)
+        fields = ('likes', 'comments', 'views')
+    rows = list(
+        queryset
+        .filter(period=period, bucket__gt=since)
+        .order_by('bucket')
+        .values('bucket', *fields)
+    )
+    for row in rows:
+        row['bucket'] = timezone.localtime(row['bucket'])
+    return rows
@@ -0,0 +1,227 @@
+"""
+app/search.py
+
+Full-text index over posts (title, author username, description).
+
+SQLite uses an FTS5 virtual table ranked with bm25(); PostgreSQL uses a
+side table holding a weighted tsvector behind a GIN index, ranked with
+ts_rank_cd(). Both are keyed by post id and carry the post type so a search
+can be scoped to reels or posts inside the index. The tables are created by
+migration 0043 and kept in sync from app/signals.py. `manage.py
+rebuild_search_index` repopulates either one from scratch.
+
+Ranking weights follow the old priority order: title matches first, then
+the author's username, then the description.
+
+Ranked id lists are cached per normalized query (see cached_ids), so a
+repeated popular search only costs the primary-key fetch of its page.
+"""
+
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import Post
+
+
+FTS_TABLE = 'app_post_fts'
+TSVECTOR_TABLE = 'app_post_search'
+
+SEARCH_RESULT_LIMIT = 200   # hard cap on ids returned for any one query
+MAX_QUERY_LENGTH = 100
+MAX_QUERY_TERMS = 8
+
+# bm25() column weights, in FTS_TABLE column order
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 0.0)
+
+# Post fields in index row order
+_FIELDS = ('id', 'post_title', 'created_by__username', 'post_description', 'post_type')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SEARCH_CACHE_TTL = 300
+SEARCH_GENERATION_KEY = 'search:generation'
+
+
+# ── WRITES ───────────────────────────────────────────────────────────────────
+
+def _row(post_id, title, username, description, post_type):
+    return [post_id, title or '', username or '', description or '', post_type]
+
+
+def _write_rows(cursor, rows):
+    if connection.vendor == 'postgresql':
+        cursor.executemany(
+            f'INSERT INTO {TSVECTOR_TABLE} (post_id, document, post_type) VALUES (%s, '
+            f"setweight(to_tsvector('simple', %s), 'A') || "
+            f"setweight(to_tsvector('simple', %s), 'B') || "
+            f"setweight(to_tsvector('simple', %s), 'C'), %s) "
+            f'ON CONFLICT (post_id) DO UPDATE '
+            f'SET document = EXCLUDED.document, post_type = EXCLUDED.post_type',
+            rows,
+        )
+    else:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, post_title, username, post_description, post_type) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def index_post(post):
+    username = post.created_by.username if post.created_by_id else ''
+    with connection.cursor() as cursor:
+        _write_rows(cursor, [_row(post.pk, post.post_title, username, post.post_description, post.post_type)])
+
+
+def index_posts_by(user_id):
+    """Re-indexes every post by a user, e.g. after a username change."""
+    rows = [
+        _row(*values)
+        for values in Post.objects
+        .filter(created_by_id=user_id)
+        .values_list(*_FIELDS)
+    ]
+    if rows:
+        with connection.cursor() as cursor:
+            _write_rows(cursor, rows)
+
+
+def unindex_post(post_id):
+    if connection.vendor == 'postgresql':
+        sql = f'DELETE FROM {TSVECTOR_TABLE} WHERE post_id = %s'
+    else:
+        sql = f'DELETE FROM {FTS_TABLE} WHERE rowid = %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [post_id])
+
+
+def rebuild_index(batch_size=1000):
+    """Empties the index and re-populates it from Post. Returns rows written."""
+    table = TSVECTOR_TABLE if connection.vendor == 'postgresql' else FTS_TABLE
+    rows = (
+        Post.objects
+        .values_list(*_FIELDS)
+        .order_by()
+        .iterator(chunk_size=batch_size)
+    )
+
+    written = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        batch = []
+        for values in rows:
+            batch.append(_row(*values))
+            if len(batch) >= batch_size:
+                _write_rows(cursor, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            _write_rows(cursor, batch)
+            written += len(batch)
+    return written
+
+
+# ── READS ────────────────────────────────────────────────────────────────────
+
+def _terms(query):
+    return _TOKEN_RE.findall(query[:MAX_QUERY_LENGTH].lower())[:MAX_QUERY_TERMS]
+
+
+def normalize_query(query):
+    """Case-folded, punctuation-stripped, whitespace-collapsed form of `query`."""
+    return ' '.join(_terms(query))
+
+
+def search_post_ids(query, post_type=None, limit=SEARCH_RESULT_LIMIT):
+    """
+    Post ids matching every term of `query` (as a prefix), best match first,
+    optionally limited to one post type. Free text is reduced to word tokens,
+    so user input can never inject FTS5 / tsquery operators.
+    """
+    return cached_ids(
+        f'posts:{post_type or "all"}:{limit}', query,
+        lambda normalized: _query_post_ids(normalized.split(), post_type, limit),
+    )
+
+
+def _query_post_ids(terms, post_type, limit):
+    if not terms:
+        return []
+
+    type_filter = ' AND post_type = %s' if post_type else ''
+    if connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT post_id FROM {TSVECTOR_TABLE}, to_tsquery('simple', %s) AS q "
+            f'WHERE document @@ q{type_filter} '
+            f'ORDER BY ts_rank_cd(document, q) DESC, post_id DESC LIMIT %s'
+        )
+        match = ' & '.join(f'{term}:*' for term in terms)
+    else:
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        sql = (
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{type_filter} '
+            f'ORDER BY bm25({FTS_TABLE}, {weights}), rowid DESC LIMIT %s'
+        )
+        match = ' '.join(f'"{term}"*' for term in terms)
+    params = [match, post_type, limit] if post_type else [match, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+# ── RESULT CACHE ─────────────────────────────────────────────────────────────
+# One entry per (namespace, normalized query) holding the full ranked id list
+# (at most SEARCH_RESULT_LIMIT ids), so every page of a search is served from
+# the same entry. Keys embed a generation bumped on post / creator writes.
+
+def _generation():
+    return cache.get_or_set(SEARCH_GENERATION_KEY, 1, None)
+
+
+def bump_search_generation():
+    try:
+        cache.incr(SEARCH_GENERATION_KEY)
+    except ValueError:
+        cache.set(SEARCH_GENERATION_KEY, 2, None)
+
+
+def cached_ids(namespace, query, compute):
+    """
+    `compute(normalized)`'s ids for the normalized form of `query`, cached.
+    `compute` only ever sees the normalized query, so everything sharing a
+    cache entry is also answered by the same lookup.
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        return []
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    key = f'search:{namespace}:{_generation()}:{digest}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = compute(normalized)
+        cache.set(key, ids, SEARCH_CACHE_TTL)
+    return ids
+
+
+def rank_by(queryset, post_ids, field='pk'):
+    """
+    Restricts `queryset` to `post_ids` and annotates `search_rank` (0 = best)
+    so it can be ordered by relevance.
+    """
+    return queryset.filter(**{f'{field}__in': post_ids}).annotate(search_rank=Case(
+        *[When(**{field: post_id}, then=Value(position)) for position, post_id in enumerate(post_ids)],
+        default=Value(len(post_ids)),
+        output_field=IntegerField(),
+    ))
+
+
+def search_posts(query, post_type=None, queryset=None, limit=SEARCH_RESULT_LIMIT):
+    """Relevance-ordered Post queryset for `query`."""
+    queryset = Post.objects.all() if queryset is None else queryset
+    post_ids = search_post_ids(query, post_type, limit)
+    return rank_by(queryset, post_ids).order_by('search_rank')
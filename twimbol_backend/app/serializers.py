@@ -3,28 +3,39 @@ from .models import *
 from user.serializers import UserProfileSerializer, UserSerializer
 from create.models import *
 from create.serializers import *
+from .engagement import (
+    MAX_SUMMARY_POST_IDS,
+    ViewerStateListSerializer,
+    ViewerStateMixin,
+    comment_preview,
+    comment_previews,
+)
 
 
 
 
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(ViewerStateMixin, serializers.ModelSerializer):
     user_profile = serializers.SerializerMethodField()
     username = serializers.SerializerMethodField()
     
-    # ✅ Read from queryset annotations — no extra DB hits per post
+    # ✅ Denormalized counter columns on Post — no extra DB hits per post
     like_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
     
-    # comments stays as method field — returns full comment objects, not just a count
+    # Capped preview (latest COMMENT_PREVIEW_SIZE); the full thread lives
+    # behind PostCommentViewSet. comment_count above carries the total.
     comments = serializers.SerializerMethodField()
     
+    # Resolved for the whole page at once by ViewerStateListSerializer
     liked_by_user = serializers.SerializerMethodField()
     hidden_by_user = serializers.SerializerMethodField()
     reported_by_user = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
+        list_serializer_class = ViewerStateListSerializer
         fields = [
             'id',
             'post_type',
@@ -32,6 +43,7 @@ class PostSerializer(serializers.ModelSerializer):
             'post_description',
             'created_at',
             'like_count',
+            'comment_count',
             'post_banner',
             'created_by',
             'user_profile',
@@ -44,41 +56,28 @@ class PostSerializer(serializers.ModelSerializer):
 
     def get_user_profile(self, obj):
         if hasattr(obj.created_by, 'profile'):
-            context = {'request': self.context.get('request')} if self.context else {}
-            return UserProfileSerializer(obj.created_by.profile, context=context).data
+            # Pass the full context so the profile can reuse viewer_state
+            return UserProfileSerializer(obj.created_by.profile, context=self.context).data
         return None
 
     def get_username(self, obj):
         return UserSerializer(obj.created_by).data
 
-    def get_comments(self, obj):
-        # Returns full comment objects for display
-        return Post_Comment.objects.filter(post=obj).values('comment')
-
-    def get_liked_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Post_Stat_like.objects.filter(post_id=obj.id, created_by=user).exists()
-        return False
+    def get_page_context(self, post_ids):
+        return {'comment_previews': comment_previews(post_ids)}
 
-    def get_hidden_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Post_Stat_hide.objects.filter(post_id=obj.id, created_by=user).exists()
-        return False
-
-    def get_reported_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Post_Stat_report.objects.filter(post_id=obj.id, created_by=user).exists()
-        return False
+    def get_comments(self, obj):
+        previews = self.context.get('comment_previews')
+        if previews is not None:
+            return previews.get(obj.id, [])
+        return comment_preview(obj.id)
 
 
 
 
 
 
-class PostSearchSerializer(serializers.ModelSerializer):
+class PostSearchSerializer(ViewerStateMixin, serializers.ModelSerializer):
     created_by = serializers.StringRelatedField()  # or use a nested serializer if needed
     trending_score = serializers.IntegerField()
     priority = serializers.IntegerField()
@@ -88,10 +87,15 @@ class PostSearchSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
+        # Resolves viewer flags for the nested reels/profiles once per page
+        list_serializer_class = ViewerStateListSerializer
         fields = ['id', 'post_title', 'post_type', 'post_description', 'post_banner', 'created_by', 'created_at', 'priority', 'trending_score', 'reels_data',  'user_profile', 'username']
     
     def get_reels_data(self, obj):
         if obj.post_type == 'reel' and hasattr(obj, 'reels'):
+            # The reel serializer reads the counters the reel feed annotates
+            obj.reels.like_count = obj.like_count
+            obj.reels.comment_count = obj.comment_count
             return ReelCloudinarySerializer(
                 obj.reels,
                 context=self.context  
@@ -114,7 +118,7 @@ class PostSearchSerializer(serializers.ModelSerializer):
 
     def get_user_profile(self, obj):
         if hasattr(obj.created_by, 'profile'):
-            return UserProfileSerializer(obj.created_by.profile).data
+            return UserProfileSerializer(obj.created_by.profile, context=self.context).data
         return None
    
     def get_username(self, obj):
@@ -157,11 +161,18 @@ class PostCommentSerializer(serializers.ModelSerializer):
     # post = PostSerializer(read_only=True)
     post = serializers.SerializerMethodField()
     created_by = serializers.SerializerMethodField()
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Post_Comment.objects.all(), required=False, allow_null=True
+    )
+    reply_count = serializers.SerializerMethodField()
 
     def get_created_by(self, obj):
+        # created_by__profile is select_related by PostCommentViewSet
         return UserProfileSerializer(obj.created_by.profile).data
     def get_post(self, obj):
-        return obj.post.id
+        return obj.post_id
+    def get_reply_count(self, obj):
+        return getattr(obj, 'reply_count', None) or 0
 
     class Meta:
         model = Post_Comment
@@ -171,12 +182,18 @@ class PostCommentSerializer(serializers.ModelSerializer):
             'comment',
             'created_by',
             'created_at',
+            'parent',
+            'depth',
+            'reply_count',
         ]
+        read_only_fields = ['depth']
 
 
 
 
 class PostStatLikeSerializer(serializers.ModelSerializer):
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True, default=None)
+
     class Meta:
         model = Post_Stat_like
         fields = '__all__'
@@ -198,6 +215,15 @@ class PostStatReportSerializer(serializers.ModelSerializer):
         read_only_fields = ('post', 'created_by', 'created_at')
 
 
+class EngagementStateQuerySerializer(serializers.Serializer):
+    """The post ids whose engagement state a client wants refreshed."""
+    post_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_SUMMARY_POST_IDS,
+    )
+
+
 
 
 
@@ -0,0 +1,153 @@
+"""
+app/signals.py
+
+Keeps the denormalized counters on Post in step with the rows they count.
+Every write goes through a single `UPDATE ... SET x = x ± 1`, so concurrent
+likes/comments never lose increments.
+
+Also seeds a FeedScore row for new posts so they rank before the next
+refresh_feed_scores run, drops a user's cached feed exclusions whenever
+they hide, report or block something, keeps follower timelines in step
+with follows/unfollows, expires cached anonymous feed pages when content
+is published or removed, and mirrors post and user writes into the
+full-text search index (app/search.py), the creator trigram index
+(app/creator_search.py) and the typeahead prefix index (app/autocomplete.py).
+"""
+
+from django.db.models import F
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from create.models import ReelCloudinary, VideoCloudinary
+from user.models import Block, Follower, UserProfile
+from . import autocomplete
+from .creator_search import index_creator
+from .exclusions import invalidate_exclusions
+from .feed import initial_score
+from .feed_cache import bump_generation
+from .search import bump_search_generation, index_post, index_posts_by, unindex_post
+from .models import FeedScore, Post, Post_Comment, Post_Stat_hide, Post_Stat_like, Post_Stat_report
+from .timelines import backfill_timeline, remove_from_timeline
+
+
+def _bump(post_id, field, delta):
+    queryset = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        # Never drive a counter below zero; reconcile_post_counters fixes drift
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=Post_Stat_like)
+def like_created(sender, instance, created, **kwargs):
+    # The like toggles (app/engagement.py) move like_count in their own
+    # statement and mark the instance `counter_applied`
+    if created and not getattr(instance, 'counter_applied', False):
+        _bump(instance.post_id, 'like_count', 1)
+
+
+@receiver(post_delete, sender=Post_Stat_like)
+def like_deleted(sender, instance, **kwargs):
+    if not getattr(instance, 'counter_applied', False):
+        _bump(instance.post_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=Post_Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        _bump(instance.post_id, 'comment_count', 1)
+
+
+@receiver(post_delete, sender=Post_Comment)
+def comment_deleted(sender, instance, **kwargs):
+    _bump(instance.post_id, 'comment_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        score = initial_score(instance.post_type)
+        FeedScore.objects.create(
+            post=instance,
+            post_type=instance.post_type,
+            recency_score=score,
+            score=score,
+        )
+
+
+@receiver([post_save, post_delete], sender=Post_Stat_hide)
+@receiver([post_save, post_delete], sender=Post_Stat_report)
+def exclusion_post_changed(sender, instance, **kwargs):
+    invalidate_exclusions(instance.created_by_id)
+
+
+@receiver([post_save, post_delete], sender=Block)
+def exclusion_block_changed(sender, instance, **kwargs):
+    invalidate_exclusions(instance.blocker_id)
+
+
+@receiver(post_save, sender=Follower)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        backfill_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follower)
+def follow_deleted(sender, instance, **kwargs):
+    remove_from_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ReelCloudinary)
+@receiver(post_save, sender=VideoCloudinary)
+def feed_content_published(sender, instance, created, **kwargs):
+    if created:
+        bump_generation()
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ReelCloudinary)
+@receiver(post_delete, sender=VideoCloudinary)
+def feed_content_removed(sender, instance, **kwargs):
+    bump_generation()
+
+
+@receiver(post_save, sender=Post)
+def post_search_indexed(sender, instance, **kwargs):
+    index_post(instance)
+    bump_search_generation()
+    autocomplete.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_search_unindexed(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+    bump_search_generation()
+    autocomplete.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def author_search_reindexed(sender, instance, created, update_fields=None, **kwargs):
+    # Skip login bookkeeping saves (update_fields=['last_login'])
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    autocomplete.index_user(instance)
+    index_creator(instance.pk)
+    bump_search_generation()
+    if not created:
+        # Posts carry the author's username in the full-text index
+        index_posts_by(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def author_search_unindexed(sender, instance, **kwargs):
+    autocomplete.unindex_user(instance.pk)
+    bump_search_generation()
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_search_reindexed(sender, instance, **kwargs):
+    autocomplete.index_user(instance.user)
+    index_creator(instance.user_id)
+    bump_search_generation()
@@ -0,0 +1,157 @@
+"""
+app/timelines.py
+
+Fan-out-on-write follower timelines.
+
+When a creator publishes, the post id is pushed into every follower's
+TimelineEntry rows in batches. The "following" feed then reads a single
+indexed range of the viewer's own rows instead of expanding the list of
+everyone they follow into the query.
+
+The fan-out itself never runs in the publishing request: the post is marked
+`fanout_pending` and, once the transaction commits, a background thread
+pushes it out and clears the mark. Until then `following_filter()` pulls
+pending posts from followed creators in directly, so a new post shows up
+in followers' feeds right away. `manage.py fan_out_timelines` finishes any
+fan-out a dead worker left behind; schedule it every few minutes.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from user.models import Follower
+from .models import Post, TimelineEntry
+
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_CAP = 500          # entries kept per user (newest first)
+FANOUT_BATCH_SIZE = 1000    # followers written per INSERT
+FOLLOW_BACKFILL = 50        # creator's recent posts copied in on a new follow
+STALE_FANOUT = timedelta(minutes=2)     # pending this long: the worker is gone
+
+
+def publish_post(post):
+    """Marks the post pending and fans it out in the background after commit."""
+    Post.objects.filter(pk=post.pk).update(fanout_pending=True)
+    transaction.on_commit(lambda: threading.Thread(
+        target=_fan_out_in_background,
+        args=(post.pk,),
+        name=f'timeline-fanout-{post.pk}',
+        daemon=True,
+    ).start())
+
+
+def _fan_out_in_background(post_id):
+    close_old_connections()
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is not None:
+            fan_out_post(post)
+    except Exception:
+        # Left pending: feeds keep pulling it and fan_out_timelines retries
+        logger.exception("timeline fan-out failed for post %s", post_id)
+    finally:
+        connection.close()
+
+
+def fan_out_pending(older_than=STALE_FANOUT):
+    """Fans out posts still pending after `older_than`. Returns how many."""
+    stale = Post.objects.filter(
+        fanout_pending=True,
+        created_at__lte=timezone.now() - older_than,
+    ).only('id', 'created_by_id', 'post_type', 'created_at')
+    done = 0
+    for post in stale.iterator(chunk_size=100):
+        fan_out_post(post)
+        done += 1
+    return done
+
+
+def following_filter(user, prefix=''):
+    """
+    Q selecting the viewer's "following" feed: their timeline rows, plus any
+    post from a followed creator whose fan-out has not finished yet. `prefix`
+    is the path to the Post ('post__' for reels).
+    """
+    pending = list(
+        Post.objects
+        .filter(fanout_pending=True, created_by__following__follower=user)
+        .values_list('pk', flat=True)
+    )
+    if not pending:
+        return Q(**{f'{prefix}timeline_entries__user': user})
+    timeline = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Q(**{f'{prefix}pk__in': timeline}) | Q(**{f'{prefix}pk__in': pending})
+
+
+def fan_out_post(post):
+    follower_ids = (
+        Follower.objects
+        .filter(following_id=post.created_by_id)
+        .values_list('follower_id', flat=True)
+        .distinct()
+        .iterator(chunk_size=FANOUT_BATCH_SIZE)
+    )
+
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(follower_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _push(post, batch)
+            batch = []
+    _push(post, batch)
+    Post.objects.filter(pk=post.pk).update(fanout_pending=False)
+
+
+def _push(post, user_ids):
+    if not user_ids:
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, post_type=post.post_type, created_at=post.created_at)
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines(user_ids)
+
+
+def trim_timelines(user_ids, cap=TIMELINE_CAP):
+    """Drops everything past the newest `cap` entries for each given user."""
+    overflow = list(
+        TimelineEntry.objects
+        .filter(user_id__in=user_ids)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=F('user_id'),
+            order_by=[F('created_at').desc(), F('post_id').desc()],
+        ))
+        .filter(position__gt=cap)
+        .values_list('pk', flat=True)
+    )
+    if overflow:
+        TimelineEntry.objects.filter(pk__in=overflow).delete()
+
+
+def backfill_timeline(user_id, creator_id):
+    """Copies a newly followed creator's recent posts into the follower's timeline."""
+    recent = Post.objects.filter(created_by_id=creator_id).order_by('-created_at')[:FOLLOW_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, post_type=post.post_type, created_at=post.created_at)
+            for post in recent.only('id', 'post_type', 'created_at')
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def remove_from_timeline(user_id, creator_id):
+    TimelineEntry.objects.filter(user_id=user_id, post__created_by_id=creator_id).delete()
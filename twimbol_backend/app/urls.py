@@ -26,6 +26,9 @@ urlpatterns = [
         'post': 'create',
         'delete': 'destroy'
     }), name='post_likes'),
+    path('api/post_likes/<int:post_id>/summary/', views.PostStatLikeViewSet.as_view({
+        'get': 'summary',
+    }), name='post_likes_summary'),
     path('api/post_hide/<int:post_id>/', views.PostStatHideViewSet.as_view({
         'get': 'list',
         'post': 'create',
@@ -36,6 +39,7 @@ urlpatterns = [
         'post': 'create',
         'delete': 'destroy'
     }), name='post_report'),
+    path('api/engagement/state/', views.EngagementStateView.as_view(), name='engagement_state'),
 
 
     path('', views.home, name='home'),
@@ -1,7 +1,10 @@
-from django.shortcuts import render, redirect
+import base64
+import json
+
+from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse, JsonResponse
 from .utils.youtube_api import get_video_data, get_video_stats
-from django.db.models import Q, Case, When, IntegerField, F
+from django.db.models import Q, Case, When, IntegerField, F, Exists, OuterRef, Value, FloatField
 from .models import *
 from .forms import *
 from user.models import Follower
@@ -17,37 +20,203 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, IsAuthenticatedOrReadOnly, AllowAny
 # import validation error
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.utils.urls import replace_query_param
 
 from create.models import *
 from create.serializers import *
 
-from user.models import Block
+from user.models import UserProfile
+
+from .autocomplete import suggest
+from .creator_search import search_creator_ids, search_creators
+from .engagement import clear_flag, engagement_summary, set_flag, viewer_state
+from .exclusions import exclude_for_user
+from .feed import POST_FOLLOW_BOOST, REEL_FOLLOW_BOOST, BoostedFeed, ranked
+from .feed_cache import anonymous_feed_key, get_cached_page, set_cached_page
+from .search import MAX_QUERY_LENGTH, search_posts
+from .timelines import following_filter, publish_post
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Without a `cursor` query param this behaves exactly like the old
+    page-number pagination. Sending `?cursor=` (empty for the first page)
+    switches to keyset mode: no COUNT(*), no OFFSET — each page is a
+    `WHERE (k1, k2, ...) < (last row)` range scan, so page 50 costs the same
+    as page 1. The response carries an opaque `next_cursor` token.
+
+    `cursor_fields` must match the queryset ordering (all descending, or all
+    ascending with `cursor_ascending = True`) and end in a unique column so
+    the position is unambiguous. A view whose ordering depends on the request
+    can supply `get_cursor_fields()` / `get_cursor_ascending()`. Lists that
+    are too long to ever count set `cursor_only = True` to always use keyset
+    mode.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_fields = ('created_at', 'pk')
+    cursor_ascending = False
+    cursor_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_only or self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        if view is not None and hasattr(view, 'get_cursor_fields'):
+            self.cursor_fields = view.get_cursor_fields()
+        if view is not None and hasattr(view, 'get_cursor_ascending'):
+            self.cursor_ascending = view.get_cursor_ascending()
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        # Fetch one extra row to learn whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def _after(self, position):
+        # (a, b, c) < (x, y, z)  ⇔  a < x  OR  (a = x AND b < y)  OR  ...
+        lookup = 'gt' if self.cursor_ascending else 'lt'
+        condition = Q()
+        for i, field in enumerate(self.cursor_fields):
+            equal = dict(zip(self.cursor_fields[:i], position[:i]))
+            condition |= Q(**equal, **{f'{field}__{lookup}': position[i]})
+        return condition
+
+    def encode_cursor(self, obj):
+        position = []
+        for field in self.cursor_fields:
+            value = getattr(obj, field)
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode()))
+        except (ValueError, TypeError):
+            raise NotFound('Invalid cursor.')
+        if not isinstance(position, list) or len(position) != len(self.cursor_fields):
+            raise NotFound('Invalid cursor.')
+        return position
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return Response({
+                'count': self.page.paginator.count,
+                'page_size': self.page_size,
+                'page': self.page.number,
+                'total_pages': self.page.paginator.num_pages,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data
+            })
+
+        next_link = None
+        if self.next_cursor:
+            next_link = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response({
+            'page_size': self.get_page_size(self.request),
+            'next': next_link,
+            'next_cursor': self.next_cursor,
+            'results': data
+        })
+
 
 
-class PostPagination(PageNumberPagination):
+class PostPagination(KeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_fields = ('feed_score', 'pk')
 
-    def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
-            'page_size': self.page_size,
-            'page': self.page.number,
-            'total_pages': self.page.paginator.num_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
 
 
 
+class FeedModeMixin:
+    """
+    `?feed=following` switches a feed viewset to the viewer's fan-out
+    timeline (app/timelines.py), ordered purely by recency.
+
+    The scored feed lists a logged-in viewer's followed creators with
+    `follow_boost` added, through BoostedFeed (app/feed.py), so the boost is
+    merged into the page instead of computed for every candidate row.
+    """
+
+    follow_boost = 0.0
+    score_field = 'global_score__score'
+
+    def is_following_feed(self):
+        return self.request.query_params.get('feed') == 'following'
+
+    def get_cursor_fields(self):
+        if self.is_following_feed():
+            return ('created_at', 'pk')
+        return self.pagination_class.cursor_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        user = self.request.user
+        if (
+            self.action != 'list'
+            or self.is_following_feed()
+            or not user.is_authenticated
+            or self.request.query_params.get('ordering')
+        ):
+            return queryset
+        # Correlated EXISTS against Follower — no followed-id list is pulled
+        # into Python or inlined into the SQL.
+        follows_creator = Exists(
+            Follower.objects.filter(follower=user, following_id=OuterRef('created_by_id'))
+        )
+        return BoostedFeed(queryset, self.score_field, follows_creator, self.follow_boost)
+
+
+
+
+class AnonymousFeedCacheMixin:
+    """
+    Serves logged-out feed pages from the shared cache (app/feed_cache.py).
+    Authenticated requests are personalised and always computed live.
+    """
+
+    feed_cache_name = None
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        key = anonymous_feed_key(request, self.feed_cache_name)
+        data = get_cached_page(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_cached_page(key, response.data)
+        return response
 
-class PostViewSet(ModelViewSet):
+
+
+
+class PostViewSet(AnonymousFeedCacheMixin, FeedModeMixin, ModelViewSet):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = PostPagination
+    feed_cache_name = 'posts'
+    follow_boost = POST_FOLLOW_BOOST
 
     filter_backends = [SearchFilter, OrderingFilter]
     filterset_fields = ['post_type']
@@ -57,122 +226,53 @@ class PostViewSet(ModelViewSet):
     def get_queryset(self):
         user = self.request.user
 
-        # ── 1. ANNOTATE COUNTS ───────────────────────────────────────────────────
-        # Posts have a direct reverse relation to Post_Stat_like and Post_Comment
-        # (post is a FK on both models), so Count works without going through
-        # an intermediate model like ReelCloudinary did.
-        queryset = Post.objects.filter(post_type='post').annotate(
-            like_count=Count("post_likes", distinct=True),
-            comment_count=Count("post_comments", distinct=True),
+        # ── 1. COUNTS ───────────────────────────────────────────────────────────
+        # like_count / comment_count are denormalized columns on Post, kept in
+        # sync by app/signals.py — no JOIN + GROUP BY over likes/comments here.
+        queryset = (
+            Post.objects
+            .select_related('created_by__profile')
+            .prefetch_related('created_by__groups')
         )
-        # ⚠️  Reverse accessor names default to lowercase model name.
-        #     Confirm with: Post_Stat_like._meta.get_field('post').remote_field.related_name
-        #     If you've set related_name="likes" on the FK, use Count("likes") instead.
 
         # ── 2. FILTERING ────────────────────────────────────────────────────────
-        if user.is_authenticated:
-            hidden_posts = Post_Stat_hide.objects.filter(
-                created_by=user
-            ).values_list("post_id", flat=True)
-            queryset = queryset.exclude(id__in=hidden_posts)
-
-            reported_posts = Post_Stat_report.objects.filter(
-                created_by=user
-            ).values_list("post_id", flat=True)
-            queryset = queryset.exclude(id__in=reported_posts)
-
-            blocked_users = Block.objects.filter(
-                blocker=user
-            ).values_list("blocked_id", flat=True)
-            queryset = queryset.exclude(created_by_id__in=blocked_users)
-
-        # ── 3. FOLLOWED-CREATOR BOOST ───────────────────────────────────────────
-        # Posts from followed creators get a flat +35 boost.
-        # Slightly lower than reels (40) because posts are less time-sensitive
-        # and users browse them less passively — discovery matters more here.
-        if user.is_authenticated:
-            followed_ids = list(
-                Follower.objects.filter(follower=user)
-                .values_list("following_id", flat=True)
+        # Hidden/reported posts and blocked creators come from a per-user
+        # cached id set (app/exclusions.py) instead of three subqueries.
+        queryset = exclude_for_user(queryset, user)
+
+        # ── 3. FOLLOWING FEED ───────────────────────────────────────────────────
+        # Reads the viewer's timeline rows written at publish time, plus
+        # followed creators' posts whose fan-out is still running.
+        if self.is_following_feed():
+            if not user.is_authenticated:
+                return queryset.none()
+            return (
+                queryset
+                .filter(post_type='post')
+                .filter(following_filter(user))
+                .order_by("-created_at", "-pk")
             )
-            followed_boost = Case(
-                When(created_by_id__in=followed_ids, then=Value(35.0)),
-                default=Value(0.0),
-                output_field=FloatField(),
-            )
-        else:
-            followed_boost = Value(0.0, output_field=FloatField())
-
-        # ── 4. RECENCY SCORE ────────────────────────────────────────────────────
-        # Posts have a longer shelf-life than reels (articles, guides, discussions
-        # stay relevant days/weeks), so the decay window is wider and gentler.
-        #
-        #   < 24 h  → 25 pts
-        #   < 7 d   → 18 pts
-        #   < 30 d  → 10 pts
-        #   < 90 d  →  4 pts   ← extra tier vs reels; good posts age gracefully
-        #   older   →  0 pts
-        now = timezone.now()
-        recency_score = Case(
-            When(created_at__gte=now - timedelta(hours=24), then=Value(25.0)),
-            When(created_at__gte=now - timedelta(days=7),   then=Value(18.0)),
-            When(created_at__gte=now - timedelta(days=30),  then=Value(10.0)),
-            When(created_at__gte=now - timedelta(days=90),  then=Value(4.0)),
-            default=Value(0.0),
-            output_field=FloatField(),
-        )
-
-        # ── 5. TRENDING SCORE ───────────────────────────────────────────────────
-        # Posts weight comments more heavily than reels do (×3 vs ×2) because
-        # leaving a comment on a text post is a stronger engagement signal than
-        # on a reel — the user actually read and thought about the content.
-        #
-        # Formula:  (likes × 3  +  comments × 3) / 100
-        #
-        # No view_count here — Post model doesn't track views.
-        # Divisor stays 100 so scores stay in the same range as reels.
-        trending_score = ExpressionWrapper(
-            (
-                F("like_count")    * 3 +
-                F("comment_count") * 3
-            ) / Value(100.0),
-            output_field=FloatField(),
-        )
 
-        # ── 6. FINAL SCORE ──────────────────────────────────────────────────────
-        feed_score = ExpressionWrapper(
-            followed_boost + recency_score + trending_score,
-            output_field=FloatField(),
-        )
-
-        return (
-            queryset
-            .annotate(feed_score=feed_score)
-            .order_by("-feed_score", "-created_at")
-        )
+        # ── 4. GLOBAL SCORE (recency + trending) ────────────────────────────────
+        # Precomputed into FeedScore by refresh_feed_scores (see app/feed.py).
+        # Filtering and ordering on FeedScore's own columns walks its
+        # (post_type, -score) index. Followed creators' posts get their flat
+        # boost (POST_FOLLOW_BOOST) in filter_queryset.
+        return ranked(queryset.filter(global_score__post_type='post'), self.score_field)
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user, post_type="post")
+        post = serializer.save(created_by=self.request.user, post_type="post")
+        publish_post(post)
 
 
 
 
 
-class ReelsPagination(PageNumberPagination):
+class ReelsPagination(KeysetPagination):
     page_size = 30
     page_size_query_param = 'page_size'
     max_page_size = 100
-
-    def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
-            'page_size': self.page_size,
-            'page': self.page.number,
-            'total_pages': self.page.paginator.num_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
+    cursor_fields = ('feed_score', 'pk')
 
 
 
@@ -207,94 +307,53 @@ class ReelsPagination(PageNumberPagination):
 
 from django.db.models import Count, FloatField, Value, Case, When, F, ExpressionWrapper
 from django.db.models import OuterRef, Subquery, IntegerField
-from django.utils import timezone
-from datetime import timedelta
+from django.db.models.functions import Coalesce
 
 
-class ReelsDataViewSet(ModelViewSet):
+class ReelsDataViewSet(AnonymousFeedCacheMixin, FeedModeMixin, ModelViewSet):
     serializer_class = ReelCloudinarySerializer
     permission_classes = [AllowAny]
     pagination_class = ReelsPagination
+    feed_cache_name = 'reels'
+    follow_boost = REEL_FOLLOW_BOOST
+    score_field = 'post__global_score__score'
 
     def get_queryset(self):
         user = self.request.user
 
-        # ── 1. ANNOTATE COUNTS FROM RELATED MODELS ──────────────────────────────
-        # like_count and comment_count live on Post_Stat_like / Post_Comment,
-        # not on ReelCloudinary — so we must annotate them before we can score.
-        # Using Count with a filtered relation keeps it a single SQL query.
-        queryset = ReelCloudinary.objects.annotate(
-            like_count=Count("post__post_likes", distinct=True),
-            comment_count=Count("post__post_comments", distinct=True),
+        # ── 1. COUNTS FROM THE PARENT POST ──────────────────────────────────────
+        # like_count and comment_count are denormalized onto Post (see
+        # app/signals.py), so they come through the one-to-one join instead
+        # of counting Post_Stat_like / Post_Comment rows on every request.
+        queryset = (
+            ReelCloudinary.objects
+            .select_related('created_by__profile')
+            .prefetch_related('created_by__groups')
+            .annotate(
+                like_count=F("post__like_count"),
+                comment_count=F("post__comment_count"),
+            )
         )
-        # ⚠️  "post__post_stat_like" uses Django's reverse accessor name.
-        #     If your related_name differs, adjust accordingly.
-        #     Default reverse name = lowercase model name + "_set" → "post_stat_like"
 
         # ── 2. FILTERING ────────────────────────────────────────────────────────
-        if user.is_authenticated:
-            hidden_posts = Post_Stat_hide.objects.filter(
-                created_by=user
-            ).values_list("post_id", flat=True)
-            queryset = queryset.exclude(post_id__in=hidden_posts)
-
-            reported_posts = Post_Stat_report.objects.filter(
-                created_by=user
-            ).values_list("post_id", flat=True)
-            queryset = queryset.exclude(post_id__in=reported_posts)
-
-            blocked_users = Block.objects.filter(
-                blocker=user
-            ).values_list("blocked_id", flat=True)
-            queryset = queryset.exclude(created_by_id__in=blocked_users)
-
-        # ── 3. FOLLOWED-CREATOR BOOST ───────────────────────────────────────────
-        if user.is_authenticated:
-            followed_ids = list(
-                Follower.objects.filter(follower=user)
-                .values_list("following_id", flat=True)
-            )
-            followed_boost = Case(
-                When(created_by_id__in=followed_ids, then=Value(30.0)),
-                default=Value(0.0),
-                output_field=FloatField(),
+        queryset = exclude_for_user(queryset, user, post_field='post_id')
+
+        # ── 3. FOLLOWING FEED ───────────────────────────────────────────────────
+        if self.is_following_feed():
+            if not user.is_authenticated:
+                return queryset.none()
+            return (
+                queryset
+                .filter(following_filter(user, prefix='post__'))
+                .order_by("-created_at", "-pk")
             )
-        else:
-            followed_boost = Value(0.0, output_field=FloatField())
-
-        # ── 4. RECENCY SCORE ────────────────────────────────────────────────────
-        now = timezone.now()
-        recency_score = Case(
-            When(created_at__gte=now - timedelta(hours=24), then=Value(30.0)),
-            When(created_at__gte=now - timedelta(days=7),   then=Value(20.0)),
-            When(created_at__gte=now - timedelta(days=30),  then=Value(10.0)),
-            default=Value(0.0),
-            output_field=FloatField(),
-        )
 
-        # ── 5. TRENDING SCORE ───────────────────────────────────────────────────
-        # Now safe — like_count and comment_count are annotated fields above.
-        # view_count is a real model field (confirmed in your Meta fields list).
-        trending_score = ExpressionWrapper(
-            (
-                F("like_count")    * 3 +
-                F("view_count")    * 1 +
-                F("comment_count") * 2
-            ) / Value(100.0),
-            output_field=FloatField(),
-        )
-
-        # ── 6. FINAL SCORE & ORDERING ───────────────────────────────────────────
-        feed_score = ExpressionWrapper(
-            followed_boost + recency_score + trending_score,
-            output_field=FloatField(),
-        )
-
-        return (
-            queryset
-            .annotate(feed_score=feed_score)
-            .order_by("-feed_score", "-created_at")
-        )
+        # ── 4. GLOBAL SCORE (recency + trending) ────────────────────────────────
+        # Precomputed on the parent post's FeedScore row (see app/feed.py) and
+        # read in index order; a reel's pk is its post id, so the tie-break
+        # is on the index too. REEL_FOLLOW_BOOST is merged in by
+        # filter_queryset.
+        return ranked(queryset.filter(post__global_score__post_type='reel'), self.score_field)
 # ```
 
 # ---
@@ -303,139 +362,207 @@ class ReelsDataViewSet(ModelViewSet):
 
 # | Concern | How it's handled |
 # |---|---|
-# | **DB load** | All 3 signals are SQL `CASE`/arithmetic — resolved in a **single annotated query**, not Python loops |
-# | **Follow lookup** | One `VALUES LIST` query upfront; used in-DB via `Case/When` — no per-reel join |
-# | **No N+1** | No `.select_related` or loops inside `get_queryset`; ORM does it all |
-# | **Pagination compatibility** | Works with your existing `ReelsPagination` — it just slices the ordered queryset |
+# | **DB load** | Recency + trending are precomputed into `FeedScore` by `refresh_feed_scores`; a page walks its `(post_type, -score)` index |
+# | **Follow lookup** | Followed creators' reels are a second index walk (correlated `EXISTS` on Follower) merged into the page with the boost |
+# | **No N+1** | Creator profile is `select_related`; viewer flags are resolved per page by `ViewerStateListSerializer` |
+# | **Pagination compatibility** | Works with `ReelsPagination` page numbers or its keyset `?cursor=` mode |
 
 # ---
 
 ### Tuning cheatsheet
-# ```
-# followed_boost  →  40   raise if you want a stronger "following" feed
-# recency < 24h   →  30   raise to favour brand-new content more aggressively
-# like weight     →   3   raise if you trust likes more than views
-# / 100 divisor   → 100   lower to make trending dominate (e.g. 50); raise to mute it
+# All weights live in app/feed.py — re-run `manage.py refresh_feed_scores` after changing them.
+# REEL_FOLLOW_BOOST   →  30   raise if you want a stronger "following" feed
+# REEL_RECENCY_TIERS  →  30   raise to favour brand-new content more aggressively
+# like weight         →   3   raise if you trust likes more than views
+# TRENDING_DIVISOR    → 100   lower to make trending dominate (e.g. 50); raise to mute it
+
+
 
 
 
 
 
+class SearchPagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_fields = ('relevance', 'pk')
+
+
 
 
 class SearchViewSet(ModelViewSet):
     serializer_class = PostSearchSerializer  # Specify the serializer class
+    pagination_class = SearchPagination
 
 
     def list(self, request):
-        query = self.request.GET.get('query', '')
-
-        if query:
-            queryset = Post.objects.annotate(
-                priority=Case(
-                    When(post_title__icontains=query, then=1),
-                    When(post_type__iexact='reel', then=2),
-                    When(created_by__username__icontains=query, then=3),
-                    When(post_description__icontains=query, then=4),
-                    default=5,
-                    output_field=IntegerField(),
-                ),
+        query = self.request.GET.get('query', '')[:MAX_QUERY_LENGTH]
+
+        # Ranked by the full-text index (bm25 / ts_rank); see app/search.py.
+        # The index returns at most SEARCH_RESULT_LIMIT ids, so even a
+        # one-letter query pages through a bounded set.
+        queryset = (
+            search_posts(query, post_type='reel')
+            .select_related('created_by__profile', 'reels__created_by__profile')
+            .prefetch_related('created_by__groups', 'reels__created_by__groups')
+            .annotate(
+                relevance=Value(0) - F('search_rank'),
+                priority=F('search_rank') + 1,
                 trending_score=Case(
                     When(video_data__isnull=False, then=(F('video_data__like_count') * 2 + F('video_data__view_count'))),
                     default=0,
                     output_field=IntegerField(),
                 )
-            ).filter(
-                (Q(post_title__icontains=query) |
-                Q(created_by__username__icontains=query) |
-                Q(post_type__icontains="post") |
-                Q(post_description__icontains=query) )
-                & Q(post_type__icontains="reel")
-            ).order_by('priority', '-trending_score', '-created_at')
-
-        else:
-            queryset = Post.objects.none()
+            )
+        )
 
-        serializer = self.serializer_class(
-            queryset,
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['query'] = query
+        response.data['creators'] = self.get_creators(query)
+        return response
+
+
+    def get_creators(self, query):
+        # Typo-tolerant trigram match on usernames / profile names
+        creator_ids = search_creator_ids(query)
+        profiles = {
+            profile.user_id: profile
+            for profile in UserProfile.objects
+            .filter(user_id__in=creator_ids)
+            .select_related('user')
+            .prefetch_related('user__groups')
+        }
+        context = {
+            'request': self.request,
+            'viewer_state': viewer_state(self.request.user, (), creator_ids),
+        }
+        return UserProfileSerializer(
+            [profiles[user_id] for user_id in creator_ids if user_id in profiles],
             many=True,
-            context={'request': request}   # ✅ inject request into context
-        )
-        return Response({
-            'query': query,
-            'results': serializer.data,
-        })
+            context=context,
+        ).data
+
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        GET /api/search/autocomplete/?query=<prefix>
+        Typeahead suggestions (creators and post titles) served from the
+        in-memory prefix index in app/autocomplete.py.
+        """
+        query = request.query_params.get('query', '')[:MAX_QUERY_LENGTH]
+        return Response({'query': query, **suggest(query)})
+
+
+
+
+
+
+
+class PostFlagToggleMixin:
+    """
+    POST sets the viewer's like / hide / report on the post and DELETE
+    clears it. Both are idempotent (app/engagement.py) and answer 200 with
+    the resulting state, plus the post's counter for flags that have one,
+    so repeated or concurrent taps are harmless. Both 404 for an unknown
+    post.
+    """
+
+    flag_model = None
+    state_key = None    # response key for the flag, e.g. 'hidden'
+
+    def get_flag_fields(self, request):
+        return {}
+
+    def get_toggle_response(self, state, counter):
+        return {self.state_key: state}
+
+    def create(self, request, *args, **kwargs):
+        post_id = self.kwargs.get('post_id')
+        try:
+            _, counter = set_flag(self.flag_model, post_id, request.user, **self.get_flag_fields(request))
+        except Post.DoesNotExist:
+            raise NotFound('Post not found.')
+        return Response(self.get_toggle_response(True, counter), status=status.HTTP_200_OK)
+
+    def destroy(self, request, *args, **kwargs):
+        post_id = self.kwargs.get('post_id')
+        try:
+            _, counter = clear_flag(self.flag_model, post_id, request.user)
+        except Post.DoesNotExist:
+            raise NotFound('Post not found.')
+        return Response(self.get_toggle_response(False, counter), status=status.HTTP_200_OK)
+
 
 
 
 
+class LikePagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_fields = ('created_at', 'pk')
+    cursor_only = True
+
 
 
 
-class PostStatLikeViewSet(ModelViewSet):
-    queryset = Post_Stat_like.objects.all().order_by('-created_at')
+class PostStatLikeViewSet(PostFlagToggleMixin, ModelViewSet):
+    """
+    GET pages through a post's likers newest first (always cursor-paginated;
+    follow `next`). GET .../summary/ returns just the count, whether the
+    viewer liked the post and the few most recent likers.
+    """
+    flag_model = Post_Stat_like
+    state_key = 'liked'
+    queryset = Post_Stat_like.objects.select_related('created_by').order_by('-created_at', '-id')
     serializer_class = PostStatLikeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = LikePagination
     lookup_field = 'post_id'
+    summary_likers = 3
 
     def get_queryset(self):
-        queryset = super().get_queryset()
         post_id = self.kwargs.get('post_id')
         if post_id:
-            try:
-                return queryset.filter(post_id=post_id)
-            except:
-                return queryset.filter(post=post_id)
-        return queryset.none()
+            return super().get_queryset().filter(post_id=post_id)
+        return Post_Stat_like.objects.none()
 
-    def perform_create(self, serializer):
+    def summary(self, request, *args, **kwargs):
         post_id = self.kwargs.get('post_id')
+        like_count = Post.objects.filter(pk=post_id).values_list('like_count', flat=True).first()
+        if like_count is None:
+            raise NotFound('Post not found.')
+
+        liked = False
+        if request.user.is_authenticated:
+            liked = Post_Stat_like.objects.filter(post_id=post_id, created_by=request.user).exists()
+
+        likers = (
+            self.get_queryset()
+            .filter(created_by__isnull=False)
+            .values_list('created_by_id', 'created_by__username')[:self.summary_likers]
+        )
+        return Response({
+            'post_id': post_id,
+            'like_count': like_count,
+            'liked': liked,
+            'recent_likers': [{'id': user_id, 'username': username} for user_id, username in likers],
+        })
 
-        # Check if like already exists - try both field names
-        try:
-            existing_like = Post_Stat_like.objects.filter(post_id=post_id, created_by=self.request.user)
-            if existing_like.exists():
-                raise ValidationError({"detail": "You already liked this post."})
-            # Save with post_id field
-            serializer.save(created_by=self.request.user, post_id=post_id)
-        except Exception as e:
-            print(f"DEBUG: Trying with 'post' field instead. Error was: {e}")
-            # If that fails, try with 'post' field
-            existing_like = Post_Stat_like.objects.filter(post=post_id, created_by=self.request.user)
-            if existing_like.exists():
-                raise ValidationError({"detail": "You already liked this post."})
-            serializer.save(created_by=self.request.user, post=post_id)
-
-    def destroy(self, request, *args, **kwargs):
-        # Get the specific like for this user and post
-        post_id = self.kwargs.get('post_id')
-        
-        try:
-            instance = Post_Stat_like.objects.get(
-                post_id=post_id, 
-                created_by=request.user
-            )
-        except Post_Stat_like.DoesNotExist:
-            return Response(
-                {"detail": "Like not found or you don't have permission to delete it."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except Post_Stat_like.MultipleObjectsReturned:
-            # If somehow there are multiple likes, delete all of them for this user
-            Post_Stat_like.objects.filter(
-                post_id=post_id, 
-                created_by=request.user
-            ).delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    def get_toggle_response(self, state, counter):
+        return {**super().get_toggle_response(state, counter), 'like_count': counter or 0}
 
 
 
 
 
-class PostStatHideViewSet(ModelViewSet):
+class PostStatHideViewSet(PostFlagToggleMixin, ModelViewSet):
+    flag_model = Post_Stat_hide
+    state_key = 'hidden'
     queryset = Post_Stat_hide.objects.all().order_by('-created_at')
     serializer_class = PostStatHideSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -451,54 +578,13 @@ class PostStatHideViewSet(ModelViewSet):
                 return queryset.filter(post=post_id)
         return queryset.none()
 
-    def perform_create(self, serializer):
-        post_id = self.kwargs.get('post_id')
-
-        # Check if like already exists - try both field names
-        try:
-            existing_hide = Post_Stat_hide.objects.filter(post_id=post_id, created_by=self.request.user)
-            if existing_hide.exists():
-                raise ValidationError({"detail": "You already hid this post."})
-            # Save with post_id field
-            serializer.save(created_by=self.request.user, post_id=post_id)
-        except Exception as e:
-            print(f"DEBUG: Trying with 'post' field instead. Error was: {e}")
-            # If that fails, try with 'post' field
-            existing_hide = Post_Stat_hide.objects.filter(post=post_id, created_by=self.request.user)
-            if existing_hide.exists():
-                raise ValidationError({"detail": "You already hid this post."})
-            serializer.save(created_by=self.request.user, post=post_id)
-
-    def destroy(self, request, *args, **kwargs):
-        # Get the specific hide for this user and post
-        post_id = self.kwargs.get('post_id')
-        
-        try:
-            instance = Post_Stat_hide.objects.get(
-                post_id=post_id,
-                created_by=request.user
-            )
-        except Post_Stat_hide.DoesNotExist:
-            return Response(
-                {"detail": "Hide not found or you don't have permission to delete it."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except Post_Stat_hide.MultipleObjectsReturned:
-            # If somehow there are multiple hides, delete all of them for this user
-            Post_Stat_hide.objects.filter(
-                post_id=post_id, 
-                created_by=request.user
-            ).delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
-
 
 
 
 
-class PostStatReportViewSet(ModelViewSet):
+class PostStatReportViewSet(PostFlagToggleMixin, ModelViewSet):
+    flag_model = Post_Stat_report
+    state_key = 'reported'
     serializer_class = PostStatReportSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'post_id'
@@ -509,34 +595,21 @@ class PostStatReportViewSet(ModelViewSet):
             return Post_Stat_report.objects.filter(post_id=post_id)
         return Post_Stat_report.objects.none()
 
-    def perform_create(self, serializer):
-        post_id = self.kwargs.get('post_id')
+    def get_flag_fields(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return {
+            'reason': serializer.validated_data.get('reason', Post_Stat_report_Reasons.OTHER),
+            'description': serializer.validated_data.get('description'),
+        }
+
+
 
-        # Prevent duplicate reports
-        if Post_Stat_report.objects.filter(post_id=post_id, created_by=self.request.user).exists():
-            raise ValidationError({"detail": "You already reported this post."})
 
-        serializer.save(
-            created_by=self.request.user,
-            post_id=post_id
-        )
 
-    def destroy(self, request, *args, **kwargs):
-        post_id = self.kwargs.get('post_id')
 
-        reports = Post_Stat_report.objects.filter(
-            post_id=post_id,
-            created_by=request.user
-        )
 
-        if not reports.exists():
-            return Response(
-                {"detail": "Report not found or you don't have permission to delete it."},
-                status=status.HTTP_404_NOT_FOUND
-            )
 
-        reports.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
@@ -572,50 +645,132 @@ class PostStatReportViewSet(ModelViewSet):
 
 
 
+class EngagementStateView(generics.GenericAPIView):
+    """
+    The viewer's like / hide / report flags and current counts for a batch
+    of posts, so cached feed items can be refreshed in one round trip.
 
+        GET  api/engagement/state/?post_ids=41,42,57
+        POST api/engagement/state/   {"post_ids": [41, 42, 57]}
 
+    Response:
+        {"states": {"41": {"liked": true, "hidden": false, "reported": false,
+                           "like_count": 12, "comment_count": 3}, ...}}
 
+    Unknown ids are omitted. Anonymous viewers get all flags false. At most
+    MAX_SUMMARY_POST_IDS ids per call; the query count does not grow with it.
+    """
 
+    serializer_class = EngagementStateQuerySerializer
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        raw = request.query_params.get('post_ids', '')
+        return self._respond({'post_ids': [part for part in raw.split(',') if part.strip()]})
+
+    def post(self, request):
+        return self._respond(request.data)
 
+    def _respond(self, data):
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        post_ids = set(serializer.validated_data['post_ids'])
+        return Response({'states': engagement_summary(self.request.user, post_ids)})
 
 
 
-class CommentPagination(PageNumberPagination):
+
+
+class CommentPagination(KeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 30
-
-    def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
-            'page_size': self.page_size,
-            'page': self.page.number,
-            'total_pages': self.page.paginator.num_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
+    cursor_fields = ('created_at', 'pk')
 
 
 
 
 class PostCommentViewSet(ModelViewSet):
-    queryset = Post_Comment.objects.all().order_by('-created_at')
+    """
+    GET  /api/posts/<post_id>/comments/                 top-level comments, newest first
+    GET  /api/posts/<post_id>/comments/?thread=<id>     every reply under comment <id>,
+                                                        in conversation (path) order
+    POST /api/posts/<post_id>/comments/                 body may carry `parent` to reply
+
+    Replies are located by materialized path (see Post_Comment.path), so a
+    whole thread is one indexed range scan on (post, path).
+    """
+    queryset = Post_Comment.objects.all().order_by('-created_at', '-pk')
     serializer_class = PostCommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = CommentPagination
 
+    def get_thread_root(self):
+        thread_id = self.request.query_params.get('thread')
+        if not thread_id:
+            return None
+        if not thread_id.isdigit():
+            raise ValidationError({'thread': 'Expected a comment id.'})
+        root = (
+            Post_Comment.objects
+            .filter(pk=thread_id, post_id=self.kwargs.get('post_id'))
+            .only('pk', 'path')
+            .first()
+        )
+        if root is None:
+            raise NotFound('Comment not found.')
+        return root
+
+    def get_cursor_fields(self):
+        return ('path',) if self.request.query_params.get('thread') else ('created_at', 'pk')
+
+    def get_cursor_ascending(self):
+        return bool(self.request.query_params.get('thread'))
+
     def get_queryset(self):
         queryset = super().get_queryset()
         post_id = self.kwargs.get('post_id')
-        if post_id:
-            return queryset.filter(post_id=post_id)
-        return queryset.none()
+        if not post_id:
+            return queryset.none()
+
+        queryset = (
+            queryset
+            .filter(post_id=post_id)
+            .select_related('created_by__profile')
+            .prefetch_related('created_by__groups')
+            .annotate(reply_count=Subquery(
+                Post_Comment.objects
+                .filter(parent_id=OuterRef('pk'))
+                .order_by()
+                .values('parent_id')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ))
+        )
+
+        if self.action != 'list':
+            return queryset
+
+        root = self.get_thread_root()
+        if root is None:
+            return queryset.filter(parent__isnull=True)
+        # Descendant paths all sort strictly between "<root path>" and
+        # "<root path minus '/'>0" ('/' < '0' in ASCII)
+        return queryset.filter(
+            path__gt=root.path,
+            path__lt=root.path[:-1] + '0',
+        ).order_by('path')
 
     def perform_create(self, serializer):
 
         post_id = self.kwargs.get('post_id')
-        post = Post.objects.filter(id=post_id).first()
+        post = get_object_or_404(Post, id=post_id)
+        parent = serializer.validated_data.get('parent')
+        if parent is not None:
+            if parent.post_id != post.id:
+                raise ValidationError({"parent": "Reply must belong to the same post."})
+            if parent.depth + 1 > Post_Comment.MAX_DEPTH:
+                raise ValidationError({"parent": "This thread is too deep to reply to."})
         serializer.save(created_by=self.request.user, post=post)
 
     def destroy(self, request, *args, **kwargs):
@@ -1030,26 +1185,10 @@ def search(request):
     query = request.GET.get('query', '')
 
     if query:
-        posts = Post.objects.annotate(
-            priority=Case(
-                When(post_title__icontains=query, then=1),  # Higher priority for post_title matches
-                When(created_by__username__icontains=query, then=2),  # Lower priority for username matches
-                When(post_description__icontains=query, then=3),  # Lower priority for username matches
-                default=4, # Default priority for no match
-                output_field=IntegerField(),
-            ),
-            trending_score=Case(
-                When(video_data__isnull=False, then=(F('video_data__like_count') * 2 + F('video_data__view_count'))),
-                default=0,
-                output_field=IntegerField(),
-            )
-        ).filter(
-            Q(post_title__icontains=query) | Q(created_by__username__icontains=query) | Q(post_description__icontains=query)).order_by('priority', '-trending_score', '-created_at')    # Order by priority, trending_score, and created_at
+        posts = search_posts(query)
 
-        # Search for creators
-        creators = User.objects.filter(
-            Q(username__icontains=query) | Q(profile__first_name__icontains=query) | Q(profile__last_name__icontains=query)
-        ).distinct().order_by('username')
+        # Search for creators (trigram similarity, tolerates typos)
+        creators = search_creators(query)
 
     else:
         posts = []
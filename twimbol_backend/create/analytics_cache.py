@@ -0,0 +1,83 @@
+"""
+create/analytics_cache.py
+
+Per-creator cache for CreatorAnalyticsView stats, with stale-while-revalidate
+and single-flight recomputation.
+
+An entry is served as-is for STATS_FRESH_TTL seconds. After that, and up to
+STATS_STALE_TTL, it is still served immediately while one background thread
+recomputes it. A cold miss is computed by exactly one request: whoever wins
+`cache.add()` on the creator's lock key. Everyone else polls the cache for up
+to LOCK_WAIT seconds for that result, and only computes it themselves if the
+winner died or is unusually slow. Popular creators therefore cost at most one
+set of aggregate queries per STATS_FRESH_TTL, however many requests arrive.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+
+
+logger = logging.getLogger(__name__)
+
+STATS_FRESH_TTL = 30        # seconds an entry is served without recomputing
+STATS_STALE_TTL = 300       # seconds a stale entry may still be served
+LOCK_TTL = 30               # upper bound on one recomputation
+LOCK_WAIT = 2.0             # seconds a cold-miss request waits for the winner
+POLL_INTERVAL = 0.05
+
+
+def _key(user_id):
+    return f'analytics:stats:{user_id}'
+
+
+def _lock_key(user_id):
+    return f'analytics:stats:{user_id}:lock'
+
+
+def get_stats(user_id, compute):
+    """Returns `compute()`'s stats for the creator, from the cache when possible."""
+    entry = cache.get(_key(user_id))
+    if entry is not None:
+        if time.time() - entry['computed_at'] >= STATS_FRESH_TTL and cache.add(_lock_key(user_id), 1, LOCK_TTL):
+            threading.Thread(
+                target=_refresh_in_background,
+                args=(user_id, compute),
+                name=f'analytics-refresh-{user_id}',
+                daemon=True,
+            ).start()
+        return entry['stats']
+
+    if cache.add(_lock_key(user_id), 1, LOCK_TTL):
+        return _refresh(user_id, compute)
+
+    deadline = time.time() + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(_key(user_id))
+        if entry is not None:
+            return entry['stats']
+    return compute()
+
+
+def _refresh(user_id, compute):
+    try:
+        stats = compute()
+        cache.set(_key(user_id), {'stats': stats, 'computed_at': time.time()}, STATS_STALE_TTL)
+        return stats
+    finally:
+        cache.delete(_lock_key(user_id))
+
+
+def _refresh_in_background(user_id, compute):
+    close_old_connections()
+    try:
+        _refresh(user_id, compute)
+    except Exception:
+        # The stale entry keeps being served until it expires
+        logger.exception("analytics refresh failed for creator %s", user_id)
+    finally:
+        connection.close()
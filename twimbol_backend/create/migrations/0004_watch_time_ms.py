@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('create', '0003_remove_reelcloudinary_like_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reelcloudinary',
+            name='watch_time_ms',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='videocloudinary',
+            name='watch_time_ms',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
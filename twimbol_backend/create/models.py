@@ -20,6 +20,8 @@ class ReelCloudinary(models.Model):
     reel_description = models.TextField(blank=True, null=True)
     thumbnail_url = models.URLField(null=True)
     view_count = models.IntegerField(default=0)
+    # Total watch time reported by clients; see create/view_counters.py
+    watch_time_ms = models.BigIntegerField(default=0)
     # like_count = models.IntegerField(default=0)
     created_by = models.ForeignKey(
         User,
@@ -53,6 +55,8 @@ class VideoCloudinary(models.Model):
     video_description = models.TextField(blank=True, null=True)
     thumbnail_url = models.URLField(null=True)
     view_count = models.IntegerField(default=0)
+    # Total watch time reported by clients; see create/view_counters.py
+    watch_time_ms = models.BigIntegerField(default=0)
     like_count = models.IntegerField(default=0)
     created_by = models.ForeignKey(
         User,
@@ -3,7 +3,8 @@ from user.models import CreatorApplication
 from user.serializers import UserProfileSerializer, UserSerializer
 from .models import *
 
-from app.models import Post_Stat_like, Post_Comment, Post_Stat_hide, Post_Stat_report
+from app.models import Post
+from app.engagement import ViewerStateListSerializer, ViewerStateMixin
 
 
 
@@ -20,14 +21,14 @@ class CreatorApplicationSerializer(serializers.ModelSerializer):
 
 
 
-class ReelCloudinarySerializer(serializers.ModelSerializer):
+class ReelCloudinarySerializer(ViewerStateMixin, serializers.ModelSerializer):
     user_profile = serializers.SerializerMethodField()
 
     # ✅ Read directly from annotated queryset values — zero extra DB hits
     like_count = serializers.IntegerField(read_only=True)
     comment_count = serializers.IntegerField(read_only=True)
 
-    # Keep these as method fields — they need per-user context
+    # Per-user flags, resolved for the whole page by ViewerStateListSerializer
     comments = serializers.SerializerMethodField()
     liked_by_user = serializers.SerializerMethodField()
     hidden_by_user = serializers.SerializerMethodField()
@@ -35,6 +36,7 @@ class ReelCloudinarySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ReelCloudinary
+        list_serializer_class = ViewerStateListSerializer
         fields = [
             'title',
             'video_url',
@@ -55,31 +57,15 @@ class ReelCloudinarySerializer(serializers.ModelSerializer):
 
     def get_user_profile(self, obj):
         if hasattr(obj.created_by, 'profile'):
-            context = {'request': self.context.get('request')} if self.context else {}
-            return UserProfileSerializer(obj.created_by.profile, context=context).data
+            return UserProfileSerializer(obj.created_by.profile, context=self.context).data
         return None
 
     def get_comments(self, obj):
         # Reuse the annotated value — no extra query
         return getattr(obj, 'comment_count', 0)
 
-    def get_liked_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Post_Stat_like.objects.filter(post=obj.post, created_by=user).exists()
-        return False
-
-    def get_hidden_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Post_Stat_hide.objects.filter(post=obj.post, created_by=user).exists()
-        return False
-
-    def get_reported_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Post_Stat_report.objects.filter(post=obj.post, created_by=user).exists()
-        return False
+    def get_viewer_post_id(self, obj):
+        return obj.post_id
 
 
 
@@ -95,3 +81,47 @@ class VideoCloudinarySerializer(serializers.ModelSerializer):
     def get_user_profile(self, obj):
         return UserProfileSerializer(obj.post.created_by.profile).data
     
+
+
+
+
+
+class ViewEventSerializer(serializers.Serializer):
+    """One client-reported view: which post, how long it was watched, when."""
+    post_id = serializers.IntegerField(min_value=1)
+    watched_ms = serializers.IntegerField(min_value=0, max_value=6 * 60 * 60 * 1000)
+    ts = serializers.DateTimeField()
+
+
+
+
+
+
+class ManagedContentSerializer(serializers.ModelSerializer):
+    """
+    A row of the creator's content-management list. Counts come from Post's
+    denormalized counters and the view_count / thumbnail_url annotations
+    ManageContentsViewSet adds, so a page costs no per-row queries.
+    """
+    view_count = serializers.IntegerField(read_only=True)
+    thumbnail_url = serializers.URLField(read_only=True)
+    # Estimated from the page's daily viewer sketches, passed in the context
+    unique_viewers_7d = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = [
+            'id',
+            'post_type',
+            'post_title',
+            'created_at',
+            'post_banner',
+            'thumbnail_url',
+            'like_count',
+            'comment_count',
+            'view_count',
+            'unique_viewers_7d',
+        ]
+
+    def get_unique_viewers_7d(self, obj):
+        return self.context.get('unique_viewers', {}).get(obj.pk, 0)
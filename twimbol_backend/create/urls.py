@@ -33,6 +33,10 @@ from .views import (
     ManageContentsViewSet,
     ApplyForCreatorViewSet,
     CreatorAnalyticsView,
+    CreatorAnalyticsTimeseriesView,
+    CreatorTopContentView,
+    ViewCounterStatusView,
+    ViewEventBatchView,
 )
 
 router = routers.DefaultRouter()
@@ -82,4 +86,42 @@ urlpatterns = [
         CreatorAnalyticsView.as_view(),
         name='creator-analytics',
     ),
+    # GET  create/api/analytics/me/timeseries/  — hourly / daily buckets (auth)
+    path(
+        'api/analytics/me/timeseries/',
+        CreatorAnalyticsTimeseriesView.as_view(),
+        name='creator-analytics-timeseries-me',
+    ),
+    # GET  create/api/analytics/<user_id>/timeseries/
+    path(
+        'api/analytics/<int:user_id>/timeseries/',
+        CreatorAnalyticsTimeseriesView.as_view(),
+        name='creator-analytics-timeseries',
+    ),
+    # GET  create/api/analytics/me/top/         — top posts per metric / window (auth)
+    path(
+        'api/analytics/me/top/',
+        CreatorTopContentView.as_view(),
+        name='creator-top-content-me',
+    ),
+    # GET  create/api/analytics/<user_id>/top/
+    path(
+        'api/analytics/<int:user_id>/top/',
+        CreatorTopContentView.as_view(),
+        name='creator-top-content',
+    ),
+
+    # ── View events ──────────────────────────────────────────────────────────
+    # POST create/api/views/batch/             — many {post_id, watched_ms, ts}
+    path(
+        'api/views/batch/',
+        ViewEventBatchView.as_view(),
+        name='view-event-batch',
+    ),
+    # GET  create/api/view-counters/           — buffer lag metric (admin only)
+    path(
+        'api/view-counters/',
+        ViewCounterStatusView.as_view(),
+        name='view-counter-status',
+    ),
 ]
\ No newline at end of file
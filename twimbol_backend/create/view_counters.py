@@ -0,0 +1,328 @@
+"""
+create/view_counters.py
+
+Write-behind buffer for reel / video view counts.
+
+`record_view()` / `record_views()` only bump counters in this process.
+Every FLUSH_INTERVAL seconds a background thread (or the request that pushes
+the buffer past BUFFER_LIMIT rows) swaps the buffer out and writes it back
+with one grouped UPDATE per model (per FLUSH_CHUNK rows):
+
+    UPDATE ... SET view_count    = view_count    + CASE pk WHEN .. THEN n ..,
+                   watch_time_ms = watch_time_ms + CASE pk WHEN .. THEN ms ..
+    WHERE pk IN (...)
+
+instead of one row-locking UPDATE per view.
+
+Each flush also adds its views to the engagement rollups (app/rollups.py)
+behind the analytics charts, in the hour / day each view happened: the
+validated client `ts` for batched events, otherwise the time it was
+recorded.
+
+Viewer identities are folded into per-post, per-day HyperLogLog sketches
+(app/hyperloglog.py) in the buffer as well, and merged into PostViewerSketch
+rows on flush, so unique viewers cost 4 KB per post per day however many
+views arrive. The same flush merges them into one CreatorViewerSketch per
+creator per day, so a creator's 30-day total is ~30 merges however many
+posts they have.
+
+Each worker flushes only its own increments, and the UPDATEs are relative,
+so any number of workers can flush concurrently without losing or double
+counting views. A failed flush puts its counts back for the next attempt; a
+killed worker loses at most one interval of views (flush() also runs at
+exit).
+
+Flush stats are published to the cache per worker; `buffer_status()` turns
+them into the lag metric shown at create/api/view-counters/.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import BigIntegerField, Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from app import rollups
+from app.hyperloglog import HyperLogLog
+from app.models import CreatorViewerSketch, Post, PostViewerSketch
+from .models import ReelCloudinary, VideoCloudinary
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5          # seconds between background flushes
+BUFFER_LIMIT = 1000         # pending rows that force an inline flush
+FLUSH_CHUNK = 500           # rows per grouped UPDATE
+STATS_KEY = 'views:buffer_stats'
+STATS_TTL = 3600
+
+MODELS = {
+    'reel': ReelCloudinary,
+    'video': VideoCloudinary,
+}
+
+_lock = threading.Lock()
+_pending = defaultdict(lambda: [0, 0])     # (kind, pk) -> [views, watched_ms] not yet written
+_sketches = defaultdict(HyperLogLog)       # (pk, day) -> viewers not yet merged
+_hourly = defaultdict(int)                 # (pk, hour) -> views not yet in the rollups
+_oldest_pending_at = None
+_flusher = None
+
+
+def viewer_key(request):
+    """Identity used for unique-viewer counting: user id, else device / client."""
+    if request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    device = request.headers.get('X-Device-Id')
+    if device:
+        return f'd:{device}'
+    return f"a:{request.META.get('REMOTE_ADDR', '')}:{request.headers.get('User-Agent', '')}"
+
+
+def record_view(kind, pk, watched_ms=0, viewer=None, ts=None):
+    record_views([(kind, pk, watched_ms, viewer, ts)])
+
+
+def record_views(events):
+    """Buffers an iterable of (kind, pk, watched_ms, viewer, ts) view events."""
+    global _oldest_pending_at
+    now = timezone.now()
+    with _lock:
+        for kind, pk, watched_ms, viewer, ts in events:
+            counts = _pending[(kind, int(pk))]
+            counts[0] += 1
+            counts[1] += watched_ms
+            # Allowed clock skew can put `ts` slightly ahead; never count into a future hour
+            moment = timezone.localtime(min(ts, now) if ts is not None else now)
+            _hourly[(int(pk), moment.replace(minute=0, second=0, microsecond=0))] += 1
+            if viewer is not None:
+                _sketches[(int(pk), moment.date())].add(viewer)
+        if _pending and _oldest_pending_at is None:
+            _oldest_pending_at = time.time()
+        overflowing = len(_pending) >= BUFFER_LIMIT
+    _ensure_flusher()
+    if overflowing:
+        flush()
+
+
+def flush():
+    """Writes every buffered view to the database. Returns views written."""
+    global _pending, _sketches, _hourly, _oldest_pending_at
+    with _lock:
+        batch, _pending = _pending, defaultdict(lambda: [0, 0])
+        sketches, _sketches = _sketches, defaultdict(HyperLogLog)
+        hourly, _hourly = _hourly, defaultdict(int)
+        oldest, _oldest_pending_at = _oldest_pending_at, None
+
+    if sketches:
+        try:
+            _merge_sketches(sketches)
+        except Exception:
+            logger.exception("viewer sketch flush failed; re-queueing %d sketch(es)", len(sketches))
+            with _lock:
+                for key, sketch in sketches.items():
+                    _sketches[key].merge(sketch)
+
+    if not batch:
+        return 0
+
+    by_kind = defaultdict(list)
+    for (kind, pk), (views, watched_ms) in batch.items():
+        by_kind[kind].append((pk, views, watched_ms))
+
+    try:
+        for kind, rows in by_kind.items():
+            for start in range(0, len(rows), FLUSH_CHUNK):
+                _apply(MODELS[kind], rows[start:start + FLUSH_CHUNK])
+    except Exception:
+        logger.exception("view counter flush failed; re-queueing %d row(s)", len(batch))
+        _requeue(batch, hourly, oldest)
+        return 0
+
+    try:
+        rollups.add_views(hourly)
+    except Exception:
+        # The counters are already written; only the chart buckets miss out
+        logger.exception("view rollup update failed for %d bucket(s)", len(hourly))
+
+    written = sum(views for views, _ in batch.values())
+    _publish_stats(rows=len(batch), views=written, lag=time.time() - oldest)
+    return written
+
+
+def _apply(model, rows):
+    model.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+        view_count=F('view_count') + Case(
+            *[When(pk=pk, then=Value(views)) for pk, views, _ in rows],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        watch_time_ms=F('watch_time_ms') + Case(
+            *[When(pk=pk, then=Value(watched_ms)) for pk, _, watched_ms in rows],
+            default=Value(0),
+            output_field=BigIntegerField(),
+        ),
+    )
+
+
+def _merge_sketches(sketches):
+    creators = dict(
+        Post.objects.filter(pk__in={pk for pk, _ in sketches}).values_list('pk', 'created_by_id')
+    )
+    sketches = {key: sketch for key, sketch in sketches.items() if key[0] in creators}
+    by_creator = defaultdict(HyperLogLog)
+    for (pk, day), sketch in sketches.items():
+        by_creator[(creators[pk], day)].merge(sketch)
+
+    with transaction.atomic():
+        _merge_into(PostViewerSketch, 'post_id', sketches)
+        _merge_into(CreatorViewerSketch, 'creator_id', by_creator)
+
+
+def _merge_into(model, owner_field, sketches):
+    # Make sure every row exists, then lock and merge (register-wise max), so
+    # concurrent flushes from several workers never drop each other's viewers
+    model.objects.bulk_create(
+        [
+            model(**{owner_field: owner}, day=day, registers=HyperLogLog().to_bytes())
+            for owner, day in sketches
+        ],
+        ignore_conflicts=True,
+    )
+    rows = (
+        model.objects
+        .select_for_update()
+        .filter(**{f'{owner_field}__in': {owner for owner, _ in sketches}}, day__in={day for _, day in sketches})
+    )
+    changed = []
+    for row in rows:
+        sketch = sketches.get((getattr(row, owner_field), row.day))
+        if sketch is not None:
+            row.registers = HyperLogLog(row.registers).merge(sketch).to_bytes()
+            changed.append(row)
+    model.objects.bulk_update(changed, ['registers'], batch_size=FLUSH_CHUNK)
+
+
+def unique_viewers(creator_id, windows=(7, 30)):
+    """
+    Estimated distinct viewers across all of a creator's posts over the last
+    N days, for each N in `windows`. One pass over the creator's daily
+    sketches, newest first: each day is merged once and every window's count
+    is read off the running union as the pass crosses its boundary.
+    """
+    today = timezone.localdate()
+    windows = sorted(windows)
+    counts = {}
+    merged = HyperLogLog()
+    rows = (
+        CreatorViewerSketch.objects
+        .filter(creator_id=creator_id, day__gt=today - timedelta(days=windows[-1]))
+        .order_by('-day')
+        .values_list('day', 'registers')
+    )
+    pending = list(windows)
+    for day, registers in rows:
+        while pending and day <= today - timedelta(days=pending[0]):
+            counts[pending.pop(0)] = merged.count()
+        merged.merge(registers)
+    for days in pending:
+        counts[days] = merged.count()
+    return counts
+
+
+def post_unique_viewers(post_ids, days=7):
+    """Estimated distinct viewers of each post over the last `days` days."""
+    since = timezone.localdate() - timedelta(days=days)
+    merged = defaultdict(HyperLogLog)
+    rows = (
+        PostViewerSketch.objects
+        .filter(post_id__in=list(post_ids), day__gt=since)
+        .values_list('post_id', 'registers')
+        .iterator(chunk_size=500)
+    )
+    for post_id, registers in rows:
+        merged[post_id].merge(registers)
+    return {post_id: sketch.count() for post_id, sketch in merged.items()}
+
+
+def _requeue(batch, hourly, oldest):
+    global _oldest_pending_at
+    with _lock:
+        for key, (views, watched_ms) in batch.items():
+            counts = _pending[key]
+            counts[0] += views
+            counts[1] += watched_ms
+        for key, views in hourly.items():
+            _hourly[key] += views
+        if _oldest_pending_at is None or oldest < _oldest_pending_at:
+            _oldest_pending_at = oldest
+
+
+def _publish_stats(rows, views, lag):
+    # Best effort: a concurrent flush in another worker may overwrite this
+    # entry until our next flush, which only delays the metric
+    stats = cache.get(STATS_KEY) or {}
+    stats[os.getpid()] = {
+        'last_flush_at': time.time(),
+        'last_flush_rows': rows,
+        'last_flush_views': views,
+        'last_flush_lag_seconds': round(lag, 3),
+    }
+    cache.set(STATS_KEY, stats, STATS_TTL)
+
+
+def _run_flusher():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        close_old_connections()
+        try:
+            flush()
+        finally:
+            connection.close()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name='view-counter-flusher', daemon=True)
+            _flusher.start()
+
+
+atexit.register(flush)
+
+
+def buffer_status():
+    """This worker's live buffer plus the last flush reported by every worker."""
+    now = time.time()
+    with _lock:
+        pending_rows = len(_pending)
+        pending_views = sum(views for views, _ in _pending.values())
+        oldest = _oldest_pending_at
+
+    workers = {
+        pid: {**stats, 'seconds_since_flush': round(now - stats['last_flush_at'], 3)}
+        for pid, stats in (cache.get(STATS_KEY) or {}).items()
+    }
+    return {
+        'flush_interval_seconds': FLUSH_INTERVAL,
+        'this_worker': {
+            'pid': os.getpid(),
+            'pending_rows': pending_rows,
+            'pending_views': pending_views,
+            'lag_seconds': round(now - oldest, 3) if oldest else 0,
+        },
+        'max_flush_lag_seconds': max(
+            (w['last_flush_lag_seconds'] for w in workers.values()), default=0
+        ),
+        'workers': workers,
+    }
@@ -23,6 +23,7 @@
 
 
 # from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound
 # from rest_framework.parsers import MultiPartParser, FormParser
 # from .models import *
 # from .serializers import *
@@ -776,32 +777,41 @@ Reels and videos are uploaded to Cloudinary by the frontend;
 the backend only receives and stores the resulting data.
 """
 
+from datetime import timedelta
+
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ViewSet
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser
 from rest_framework.parsers import JSONParser
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
 
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Value
+from django.db.models.functions import Coalesce
 from django.db import transaction
 from rest_framework.decorators import action
-from django.db.models import F
+from django.utils import timezone
 
-from app.models import Post, Post_Stat_like, Post_Comment
+from app import leaderboards, rollups
+from app.models import CreatorTopContent, EngagementRollup, Post, Post_Stat_like, Post_Comment
 from app.serializers import PostSerializer
+from app.timelines import publish_post
 from user.models import CreatorApplication, Follower
 from notifications.models import Notification
 
+from . import analytics_cache, view_counters
+from .exports import EXPORT_FORMATS, streaming_export
 from .models import ReelCloudinary, VideoCloudinary
 from .serializers import (
     ReelCloudinarySerializer,
     VideoCloudinarySerializer,
     CreatorApplicationSerializer,
+    ManagedContentSerializer,
+    ViewEventSerializer,
 )
 
 
@@ -857,6 +867,8 @@ class ReelCloudinaryViewSet(ModelViewSet):
     """
 
     queryset = ReelCloudinary.objects.select_related('created_by', 'post').order_by('-created_at')
+    # Reel / video ids are their post's integer pk
+    lookup_value_regex = r'\d+'
     serializer_class = ReelCloudinarySerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [JSONParser]
@@ -898,6 +910,7 @@ class ReelCloudinaryViewSet(ModelViewSet):
         })
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        publish_post(post)
 
         Notification.objects.create(
             user=request.user,
@@ -924,8 +937,10 @@ class ReelCloudinaryViewSet(ModelViewSet):
     
     @action(detail=True, methods=['post'], permission_classes=[AllowAny], url_path='record-view')
     def record_view(self, request, pk=None):
-        reel = self.get_object()
-        ReelCloudinary.objects.filter(pk=pk).update(view_count=F('view_count') + 1)
+        # Buffered and flushed in batches; see create/view_counters.py
+        if not ReelCloudinary.objects.filter(pk=pk).exists():
+            raise NotFound('Reel not found.')
+        view_counters.record_view('reel', pk, viewer=view_counters.viewer_key(request))
         return Response({'status': 'ok'})
 
 
@@ -953,6 +968,8 @@ class VideoCloudinaryViewSet(ModelViewSet):
     """
 
     queryset = VideoCloudinary.objects.select_related('created_by', 'post').order_by('-created_at')
+    # Reel / video ids are their post's integer pk
+    lookup_value_regex = r'\d+'
     serializer_class = VideoCloudinarySerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [JSONParser]
@@ -994,6 +1011,7 @@ class VideoCloudinaryViewSet(ModelViewSet):
         })
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        publish_post(post)
 
         Notification.objects.create(
             user=request.user,
@@ -1019,7 +1037,9 @@ class VideoCloudinaryViewSet(ModelViewSet):
 
     @action(detail=True, methods=['post'], permission_classes=[AllowAny], url_path='record-view')
     def record_view(self, request, pk=None):
-        VideoCloudinary.objects.filter(pk=pk).update(view_count=F('view_count') + 1)
+        if not VideoCloudinary.objects.filter(pk=pk).exists():
+            raise NotFound('Video not found.')
+        view_counters.record_view('video', pk, viewer=view_counters.viewer_key(request))
         return Response({'status': 'ok'})
 
 # ---------------------------------------------------------------------------
@@ -1059,7 +1079,8 @@ class PostAPIViewSet(ModelViewSet):
     def perform_create(self, serializer):
         if not _is_creator_or_admin(self.request.user):
             raise PermissionError('Only creators and admins can create posts.')
-        serializer.save(created_by=self.request.user)
+        post = serializer.save(created_by=self.request.user)
+        publish_post(post)
 
     def create(self, request, *args, **kwargs):
         if not _is_creator_or_admin(request.user):
@@ -1135,8 +1156,29 @@ class CreatorPostsViewSet(ViewSet):
 class ManageContentsViewSet(ViewSet):
     """
     Endpoints:
-        GET    create/api/manage-contents/          — list authenticated creator's posts
+        GET    create/api/manage-contents/          — authenticated creator's posts, paginated
+        GET    create/api/manage-contents/export/   — all of them as a streamed CSV / NDJSON file
         DELETE create/api/manage-contents/<post_id>/ — delete a specific post (owner only)
+
+    Supports ?post_type=<reel|video|post>, ?page and ?page_size (export:
+    ?post_type and ?output=<csv|ndjson>).
+
+    Response shape:
+        {
+            "total_posts": 42, "total_likes": 1380, "total_comments": 210, "total_views": 29500,
+            "by_type": {"reel": {"posts": 30, "likes": 1100, "comments": 150, "views": 27000}, ...},
+            "count": 42, "page": 1, "total_pages": 3, "next": "...", "previous": null,
+            "results": [{"id": 7, "post_type": "reel", "like_count": 12, "view_count": 480,
+                         "unique_viewers_7d": 310, ...}, ...]
+        }
+
+    DB strategy (4 queries after the creator check, however many posts there are):
+        Q1 — one GROUP BY post_type aggregate over the creator's posts for the totals
+        Q2 — COUNT for the paginator
+        Q3 — the page, with view_count / thumbnail_url annotated from the
+             reel / video rows and likes / comments from Post's counters
+        Q4 — the page's PostViewerSketch rows for the last 7 days, merged
+             per post into unique_viewers_7d
     """
 
     permission_classes = [IsAuthenticated]
@@ -1148,18 +1190,74 @@ class ManageContentsViewSet(ViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        posts = Post.objects.filter(created_by=request.user).order_by('-created_at')
-        serializer = PostSerializer(posts, many=True, context={'request': request})
+        posts = self._get_posts(request).annotate(
+            view_count=Coalesce('reels__view_count', 'videos__view_count', Value(0)),
+        )
+
+        by_type = {
+            row['post_type']: {key: row[key] or 0 for key in ('posts', 'likes', 'comments', 'views')}
+            for row in (
+                posts
+                .order_by()
+                .values('post_type')
+                .annotate(
+                    posts=Count('pk'),
+                    likes=Sum('like_count'),
+                    comments=Sum('comment_count'),
+                    views=Sum('view_count'),
+                )
+            )
+        }
 
-        total_likes = sum(
-            Post_Stat_like.objects.filter(post=post).count() for post in posts
+        paginator = StandardPagination()
+        page = paginator.paginate_queryset(
+            posts
+            .annotate(thumbnail_url=Coalesce('reels__thumbnail_url', 'videos__thumbnail_url'))
+            .order_by('-created_at', '-id'),
+            request,
+        )
+        response = paginator.get_paginated_response(
+            ManagedContentSerializer(page, many=True, context={
+                'request': request,
+                'unique_viewers': view_counters.post_unique_viewers([post.pk for post in page], days=7),
+            }).data
         )
+        response.data = {
+            'total_posts':    sum(group['posts'] for group in by_type.values()),
+            'total_likes':    sum(group['likes'] for group in by_type.values()),
+            'total_comments': sum(group['comments'] for group in by_type.values()),
+            'total_views':    sum(group['views'] for group in by_type.values()),
+            'by_type':        by_type,
+            **response.data,
+        }
+        return response
 
-        return Response({
-            'total_posts': posts.count(),
-            'total_likes': total_likes,
-            'posts': serializer.data,
-        })
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """GET create/api/manage-contents/export/ — streamed, constant memory (create/exports.py)"""
+        if not _is_creator_or_admin(request.user):
+            return Response(
+                {'detail': 'Permission denied.'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # `output`, not `format`: DRF reserves ?format= for renderer selection
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'output': f'Expected one of: {", ".join(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        filename = f'{request.user.username}-contents-{timezone.localdate():%Y%m%d}'
+        return streaming_export(self._get_posts(request), output, filename)
+
+    def _get_posts(self, request):
+        posts = Post.objects.filter(created_by=request.user)
+        post_type = request.query_params.get('post_type')
+        if post_type:
+            posts = posts.filter(post_type=post_type)
+        return posts
 
     def destroy(self, request, pk=None):
         post = get_object_or_404(Post, pk=pk)
@@ -1236,14 +1334,22 @@ class CreatorAnalyticsView(APIView):
             "total_posts":    42,
             "total_likes":    1380,
             "total_views":    29500,
-            "total_followers": 834
+            "total_followers": 834,
+            "unique_viewers_7d":  2100,
+            "unique_viewers_30d": 6400
         }
 
-    DB strategy (4 queries total, no per-post loops):
+    DB strategy (5 queries total, no per-post loops):
         Q1 — Post.objects.filter(created_by=user).aggregate(Count)
         Q2 — Post_Stat_like.objects.filter(post__created_by=user).aggregate(Count)
         Q3 — ReelCloudinary + VideoCloudinary view_count summed via aggregate(Sum)
         Q4 — Follower.objects.filter(following=user).aggregate(Count)
+        Q5 — PostViewerSketch rows for the last 30 days, merged as HyperLogLogs
+
+    Results are cached per creator (create/analytics_cache.py): up to 30s
+    old they are served directly, up to 5 min old they are served while one
+    background recomputation runs, and a cold miss is computed once while
+    concurrent requests wait for it.
     """
 
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -1276,6 +1382,9 @@ class CreatorAnalyticsView(APIView):
         # ── Q4: total followers ──────────────────────────────────────────────
         total_followers = Follower.objects.filter(following=user).count()
 
+        # ── Q5: unique viewers — daily HyperLogLog sketches merged per window ─
+        unique = view_counters.unique_viewers(user.id, windows=(7, 30))
+
         return {
             'user_id':         user.id,
             'username':        user.username,
@@ -1283,6 +1392,8 @@ class CreatorAnalyticsView(APIView):
             'total_likes':     total_likes,
             'total_views':     total_views,
             'total_followers': total_followers,
+            'unique_viewers_7d':  unique[7],
+            'unique_viewers_30d': unique[30],
         }
 
     def get(self, request, user_id=None):
@@ -1297,4 +1408,259 @@ class CreatorAnalyticsView(APIView):
         else:
             user = get_object_or_404(User, pk=user_id)
 
-        return Response(self._get_stats(user), status=status.HTTP_200_OK)
\ No newline at end of file
+        stats = analytics_cache.get_stats(user.id, lambda: self._get_stats(user))
+        return Response(stats, status=status.HTTP_200_OK)
+
+
+class CreatorAnalyticsTimeseriesView(APIView):
+    """
+    Hourly or daily engagement for a creator (or one of their posts), read
+    from the rollup tables (app/rollups.py) rather than the raw event tables.
+
+    Endpoints:
+        GET  create/api/analytics/me/timeseries/
+        GET  create/api/analytics/<user_id>/timeseries/
+
+    Query params:
+        period   — "day" (default) or "hour"
+        days     — window length; default 30, at most 365 (day) / 14 (hour)
+        post_id  — optional, one of the creator's posts
+
+    Response shape:
+        {
+            "user_id": 12,
+            "post_id": null,
+            "period":  "day",
+            "days":    30,
+            "totals":  {"likes": 310, "comments": 42, "views": 9120, "follows": 18},
+            "buckets": [
+                {"bucket": "2026-09-19T00:00:00+06:00", "likes": 12, "comments": 1,
+                 "views": 380, "follows": 0},
+                ...
+            ]
+        }
+
+    Buckets without activity are omitted. A 90-day chart is one indexed
+    range read of at most 90 rows. Likes, comments and follows appear once
+    `manage.py roll_up_engagement` has run; views within one flush interval.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    max_days = {EngagementRollup.DAY: 365, EngagementRollup.HOUR: 14}
+
+    def get(self, request, user_id=None):
+        if user_id is None:
+            if not request.user.is_authenticated:
+                return Response(
+                    {'detail': 'Authentication required.'},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+            user = request.user
+        else:
+            user = get_object_or_404(User, pk=user_id)
+
+        period = request.query_params.get('period', EngagementRollup.DAY)
+        if period not in self.max_days:
+            return Response(
+                {'period': f'Expected one of: {", ".join(self.max_days)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.max_days[period]:
+            return Response(
+                {'days': f'Expected a number of days between 1 and {self.max_days[period]}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        post_id = request.query_params.get('post_id')
+        if post_id is not None:
+            if not post_id.isdigit():
+                return Response({'post_id': 'Expected a post id.'}, status=status.HTTP_400_BAD_REQUEST)
+            post_id = get_object_or_404(Post, pk=post_id, created_by=user).pk
+
+        buckets = rollups.timeseries(user.id, period, days, post_id=post_id)
+        fields = ('likes', 'comments', 'views') + (('follows',) if post_id is None else ())
+        return Response({
+            'user_id': user.id,
+            'post_id': post_id,
+            'period':  period,
+            'days':    days,
+            'totals':  {field: sum(row[field] for row in buckets) for field in fields},
+            'buckets': buckets,
+        }, status=status.HTTP_200_OK)
+
+
+class CreatorTopContentView(APIView):
+    """
+    A creator's best posts by views, likes or comments, read straight from
+    the precomputed leaderboard table (app/leaderboards.py).
+
+    Endpoints:
+        GET  create/api/analytics/me/top/
+        GET  create/api/analytics/<user_id>/top/
+
+    Query params:
+        metric     — "views" (default), "likes" or "comments"
+        window     — "7d" (default), "30d" or "all"
+        post_type  — optional, e.g. "reel" for "top reels"
+        limit      — 1-10, default 10
+
+    Response shape:
+        {
+            "user_id": 12, "metric": "views", "window": "7d", "post_type": "reel",
+            "refreshed_at": "2026-10-18T14:00:00+06:00",
+            "results": [
+                {"rank": 1, "post_id": 41, "post_type": "reel", "post_title": "...", "value": 5120},
+                ...
+            ]
+        }
+
+    One query regardless of how many posts the creator has. Rankings are as
+    fresh as the last `manage.py refresh_creator_leaderboards` run.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, user_id=None):
+        if user_id is None:
+            if not request.user.is_authenticated:
+                return Response(
+                    {'detail': 'Authentication required.'},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+            user_id = request.user.id
+        else:
+            user_id = get_object_or_404(User, pk=user_id).id
+
+        errors = {}
+        metric = request.query_params.get('metric', 'views')
+        if metric not in dict(CreatorTopContent.METRIC_CHOICES):
+            errors['metric'] = f'Expected one of: {", ".join(leaderboards.METRICS)}.'
+        window = request.query_params.get('window', '7d')
+        if window not in dict(CreatorTopContent.WINDOW_CHOICES):
+            errors['window'] = f'Expected one of: {", ".join(leaderboards.WINDOWS)}.'
+        try:
+            limit = int(request.query_params.get('limit', leaderboards.LEADERBOARD_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= leaderboards.LEADERBOARD_SIZE:
+            errors['limit'] = f'Expected a number between 1 and {leaderboards.LEADERBOARD_SIZE}.'
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        post_type = request.query_params.get('post_type') or None
+        entries = leaderboards.top_content(user_id, metric, window, post_type=post_type, limit=limit)
+        refreshed_at = max((entry.refreshed_at for entry in entries), default=None)
+        return Response({
+            'user_id':      user_id,
+            'metric':       metric,
+            'window':       window,
+            'post_type':    post_type,
+            'refreshed_at': timezone.localtime(refreshed_at) if refreshed_at else None,
+            'results': [
+                {
+                    'rank':       rank,
+                    'post_id':    entry.post_id,
+                    'post_type':  entry.post_type,
+                    'post_title': entry.post.post_title,
+                    'value':      entry.value,
+                }
+                for rank, entry in enumerate(entries, start=1)
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+# ---------------------------------------------------------------------------
+# 8. View events — batched ingestion and buffer health
+# ---------------------------------------------------------------------------
+
+class ViewEventBatchView(APIView):
+    """
+    Records many reel / video views in one request.
+
+    Endpoint:
+        POST create/api/views/batch/
+
+    Expected POST body (JSON):
+        {
+            "events": [
+                {"post_id": 41, "watched_ms": 12800, "ts": "2026-10-18T14:02:11Z"},
+                ...
+            ]
+        }
+
+    Response:
+        { "accepted": 29, "rejected": 1 }
+
+    Events are validated together: one query per model resolves which
+    post ids are reels or videos, and events for anything else, or with a
+    timestamp outside the accepted window, are rejected. Accepted events go
+    into the same write-behind buffer as record-view (create/view_counters.py),
+    adding to view_count, watch_time_ms and the daily unique-viewer sketch.
+    """
+
+    permission_classes = [AllowAny]
+    max_events = 200
+    max_event_age = timedelta(days=1)
+    max_clock_skew = timedelta(minutes=5)
+
+    def post(self, request):
+        events = request.data.get('events') if isinstance(request.data, dict) else request.data
+        if not isinstance(events, list):
+            return Response({'events': 'Expected a list of view events.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > self.max_events:
+            return Response(
+                {'events': f'At most {self.max_events} events per batch.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        valid = []
+        for event in events:
+            serializer = ViewEventSerializer(data=event)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+
+        now = timezone.now()
+        valid = [
+            event for event in valid
+            if now - self.max_event_age <= event['ts'] <= now + self.max_clock_skew
+        ]
+
+        post_ids = {event['post_id'] for event in valid}
+        kinds = {}
+        for kind, model in view_counters.MODELS.items():
+            kinds.update((pk, kind) for pk in model.objects.filter(pk__in=post_ids).values_list('pk', flat=True))
+
+        viewer = view_counters.viewer_key(request)
+        accepted = [
+            (kinds[event['post_id']], event['post_id'], event['watched_ms'], viewer, event['ts'])
+            for event in valid
+            if event['post_id'] in kinds
+        ]
+        view_counters.record_views(accepted)
+
+        return Response(
+            {'accepted': len(accepted), 'rejected': len(events) - len(accepted)},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ViewCounterStatusView(APIView):
+    """
+    Admin-only health of the buffered view counters (create/view_counters.py).
+
+    Endpoint:
+        GET  create/api/view-counters/
+
+    `this_worker.lag_seconds` is how long the oldest unflushed view in the
+    answering worker has been waiting; `max_flush_lag_seconds` is the worst
+    age of a view at write time across all workers' last flushes.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(view_counters.buffer_status(), status=status.HTTP_200_OK)
@@ -103,6 +103,28 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared cache for feed exclusions and other hot read paths. Point REDIS_URL
+# at a Redis instance in production so invalidations reach every worker;
+# without it each process falls back to its own in-memory cache.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
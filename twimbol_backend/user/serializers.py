@@ -35,11 +35,18 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'user_group': [group.name for group in obj.user.groups.all()]
         }
     def get_followed_by_user(self, obj):
+        # Set by app.engagement.ViewerStateListSerializer when listing posts
+        state = self.context.get('viewer_state')
+        if state is not None:
+            return obj.user_id in state['following']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Follower.objects.filter(following=obj.user, follower=request.user).exists()
         return False
     def get_blocked_by_user(self, obj):
+        state = self.context.get('viewer_state')
+        if state is not None:
+            return obj.user_id in state['blocked']
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Block.objects.filter(blocked=obj.user, blocker=request.user).exists()
@@ -367,7 +367,7 @@ export default function PostCard({ post, onHidden }) {
         post.user_profile?.username ||
         post.user_profile?.user?.username ||
         "User";
-    const commentCount = post.comments?.length || post.comment_count || 0;
+    const commentCount = post.comment_count ?? post.comments?.length ?? 0;
     const shareCount = post.share_count || 0;
     const description = post.post_description || post.post_title || "";
     const createdAt = post.created_at ? formatTime(post.created_at) : "";